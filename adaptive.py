@@ -0,0 +1,84 @@
+import random
+from typing import List
+
+from model import Parameters
+
+# Outcomes of one destroy/repair call, in the order of Parameters.scores
+NEW_BEST, IMPROVED, ACCEPTED, REJECTED = range(4)
+
+
+class OperatorWeights:
+    """Roulette-wheel weights of one operator family (destroy or repair).
+
+    'classic' adds the score to the weight right away and renormalizes every
+    segment once the weights grow large. 'time' collects score and CPU time
+    per operator over a segment and then moves each weight towards its score
+    per second with the reaction factor, so cheap operators that improve as
+    often as expensive ones end up selected more under a time budget.
+    """
+
+    def __init__(self, weights: List[float], params: Parameters):
+        self.weights = list(weights)
+        self.mode = params.operator_selection
+        self.scores = params.scores
+        self.segment_length = params.segment_length
+        self.reaction_factor = params.reaction_factor
+        self.min_weight_ratio = params.min_weight_ratio
+
+        n = len(self.weights)
+        self.segment_score = [0.0] * n
+        self.segment_time = [0.0] * n
+        self.segment_calls = [0] * n
+
+        # Totals over the whole run (for reporting)
+        self.calls = [0] * n
+        self.total_time = [0.0] * n
+
+    def select(self) -> int:
+        return random.choices(range(len(self.weights)), weights=self.weights)[0]
+
+    def reward(self, idx: int, outcome: int, elapsed: float):
+        """Record the outcome and CPU time of one call of operator idx"""
+        self.calls[idx] += 1
+        self.total_time[idx] += elapsed
+
+        if self.mode == 'classic':
+            if outcome in (NEW_BEST, IMPROVED):
+                self.weights[idx] += self.scores[0]
+            elif outcome == ACCEPTED:
+                self.weights[idx] += self.scores[2]
+            return
+
+        if outcome != REJECTED:
+            self.segment_score[idx] += self.scores[outcome]
+        self.segment_time[idx] += elapsed
+        self.segment_calls[idx] += 1
+
+    def end_iteration(self, iteration: int):
+        """Close the segment every segment_length iterations"""
+        if (iteration + 1) % self.segment_length != 0:
+            return
+
+        if self.mode == 'classic':
+            # Normalize weights periodically
+            if sum(self.weights) > 100:
+                total = sum(self.weights)
+                self.weights = [w / total * 10 for w in self.weights]
+            return
+
+        r = self.reaction_factor
+        for i in range(len(self.weights)):
+            if self.segment_calls[i] == 0:
+                continue
+            # Score per CPU second over the segment
+            rate = self.segment_score[i] / max(self.segment_time[i], 1e-6)
+            self.weights[i] = (1 - r) * self.weights[i] + r * rate
+
+        # Keep every operator selectable
+        floor = max(self.weights) * self.min_weight_ratio
+        self.weights = [max(w, floor) for w in self.weights]
+
+        n = len(self.weights)
+        self.segment_score = [0.0] * n
+        self.segment_time = [0.0] * n
+        self.segment_calls = [0] * n
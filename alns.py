@@ -2,40 +2,112 @@ import numpy as np
 import random
 import math
 import copy
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Callable, Optional
 import time
 
 from model import Instance, Parameters
 from initial_solution import create_initial_solution
-from destroy import random_removal, worst_removal, related_removal
-from repair import greedy_insertion, regret_insertion
+from destroy import random_removal, worst_removal, related_removal, critical_removal, string_removal
+from repair import greedy_insertion, regret_insertion, blink_insertion
 from solution import Solution
+from adaptive import OperatorWeights, NEW_BEST, IMPROVED, ACCEPTED, REJECTED
+from annealing import Temperature, CALIBRATION_SHARE
+from elite import ElitePool, path_relink
+from route_pool import RoutePool
+from exact import solve_exact
+from bounds import lower_bound, gap
+from parallel import Candidate, CandidateRunner
+import events
 
-def alns(instance: Instance, params: Parameters) -> Solution:
-    """ALNS algorithm - OPTIMIZED"""
-    print("Creating initial solution...")
-    current = create_initial_solution(instance, params)
+def alns(instance: Instance, params: Parameters,
+         callback: Optional[Callable[[int, Solution], bool]] = None,
+         initial: Optional[Solution] = None) -> Solution:
+    """ALNS algorithm - OPTIMIZED
+
+    callback(iteration, best) is called after every iteration; returning
+    True stops the search and returns the best solution so far. initial
+    (evaluated under params) warm-starts the search instead of the
+    construction heuristic. params.batch_size > 1 tries that many
+    destroy/repair candidates per iteration on params.batch_workers
+    processes (parallel.py).
+    """
+    runner = CandidateRunner(instance, params) if params.batch_size > 1 else None
+    try:
+        return _search(instance, params, callback, initial, runner)
+    finally:
+        if runner is not None:
+            runner.close()
+
+
+def _search(instance: Instance, params: Parameters,
+            callback: Optional[Callable[[int, Solution], bool]],
+            initial: Optional[Solution], runner: Optional[CandidateRunner]) -> Solution:
+    if params.seed is not None:
+        random.seed(params.seed)
+
+    if initial is not None:
+        source = "Starting from given solution..."
+        current = initial.copy()
+    else:
+        source = "Creating initial solution..."
+        current = create_initial_solution(instance, params)
     best = current.copy()
 
-    print(f"Initial makespan: {best.makespan:.2f} hours")
+    # Makespan lower bound for the live gap and gap-based termination
+    bound = lower_bound(instance, params)
+
+    events.emit('alns_start', events.PROGRESS, source=source, makespan=float(best.makespan),
+                lower_bound=bound, gap=gap(best.makespan, bound),
+                max_iterations=params.max_iterations, time_limit=params.time_limit)
 
     # ALNS parameters
-    temp = params.temp_start
-    weights_destroy = params.weights['destroy'].copy()
-    weights_repair = params.weights['repair'].copy()
+    destroy_weights = OperatorWeights(params.weights['destroy'], params)
+    repair_weights = OperatorWeights(params.weights['repair'], params)
 
-    destroy_ops = [random_removal, worst_removal, related_removal]
-    repair_ops = [greedy_insertion, regret_insertion]
+    destroy_ops = [random_removal, worst_removal, related_removal, critical_removal, string_removal]
+    repair_ops = [greedy_insertion, regret_insertion, blink_insertion]
 
     # Adaptive parameters
     no_improvement_count = 0
+    iters_since_best = 0  # Stagnation counter for restarts
     best_makespan_history = [best.makespan]
+
+    # Elite pool for path relinking (elite_size 0 disables it)
+    elite = ElitePool(params.elite_size, params.elite_min_distance) if params.elite_size > 0 else None
+    if elite is not None:
+        elite.add(best)
+
+    # Truck routes collected for recombination (recombine_interval 0 disables it)
+    pool = RoutePool(params.route_pool_size) if params.recombine_interval > 0 else None
+    if pool is not None:
+        pool.add_solution(best)
     
+    # Small enough to solve exactly once the search provides an upper bound
+    exact_fast_path = (len(instance.customers) <= params.exact_max_customers
+                       and not any(best.frozen))
+
     # Dynamic destroy rate
     destroy_rate = params.destroy_rate
 
-    print("\nRunning ALNS...")
     start_time = time.time()
+
+    # Simulated annealing temperature, calibrated on the starting solution unless fixed.
+    # Calibration counts against time_limit and may use at most a share of it
+    temperature = Temperature(params)
+    if params.temp_start is None or (params.temp_end is None and params.cooling_rate is None):
+        q = max(1, int(len(instance.customers) * destroy_rate))
+        deadline = (start_time + CALIBRATION_SHARE * params.time_limit
+                    if params.time_limit is not None else None)
+        mean_delta, samples = temperature.calibrate(current, destroy_ops, repair_ops, q, deadline)
+        events.emit('calibration', events.PROGRESS, temp_start=temperature.start,
+                    temp_end=temperature.end, mean_delta=mean_delta, samples=samples)
+
+    def progress(iter):
+        """Spent fraction of the iteration or time budget, whichever is further along"""
+        done = (iter + 1) / params.max_iterations
+        if params.time_limit:
+            done = max(done, (time.time() - start_time) / params.time_limit)
+        return done
     
     for iter in range(params.max_iterations):
         # Adaptive destroy rate
@@ -45,82 +117,195 @@ def alns(instance: Instance, params: Parameters) -> Solution:
         elif no_improvement_count > 0 and no_improvement_count % 20 == 0:
             destroy_rate = max(0.2, destroy_rate * 0.9)  # Decrease destruction
 
-        # Select operators using roulette wheel
-        destroy_idx = random.choices(range(len(destroy_ops)), weights=weights_destroy)[0]
-        repair_idx = random.choices(range(len(repair_ops)), weights=weights_repair)[0]
-
-        # Destroy - adaptive number of customers
         q = max(1, int(len(instance.customers) * destroy_rate))
-        destroyed, removed = destroy_ops[destroy_idx](current, q)
+        if runner is None:
+            # Select operators using roulette wheel
+            destroy_idx = destroy_weights.select()
+            repair_idx = repair_weights.select()
 
-        # Repair
-        new_sol = repair_ops[repair_idx](destroyed, removed)
+            # Destroy - adaptive number of customers
+            t0 = time.process_time()
+            destroyed, removed = destroy_ops[destroy_idx](current, q)
 
-        # Acceptance criterion (Simulated Annealing)
-        delta = new_sol.makespan - current.makespan
+            # Repair
+            t1 = time.process_time()
+            new_sol = repair_ops[repair_idx](destroyed, removed)
+            t2 = time.process_time()
+            batch = [Candidate(destroy_ops[destroy_idx], repair_ops[repair_idx], new_sol,
+                               len(removed), t1 - t0, t2 - t1)]
+        else:
+            # Operators and seeds come from the main stream, so the batch is reproducible
+            specs = [(destroy_ops[destroy_weights.select()], repair_ops[repair_weights.select()],
+                      random.getrandbits(32)) for _ in range(params.batch_size)]
+            batch = runner.run(current, specs, q)
 
-        accept = False
-        if delta < 0:
-            # Improvement
-            current = new_sol
-            weights_destroy[destroy_idx] += params.scores[0]
-            weights_repair[repair_idx] += params.scores[0]
-            accept = True
+        # With 'best' acceptance only the best candidate of the batch is tested
+        chosen = None
+        if params.batch_acceptance == 'best':
+            chosen = min(batch, key=lambda c: c.makespan)
 
-            if new_sol.makespan < best.makespan:
-                improvement = best.makespan - new_sol.makespan
-                best = new_sol.copy()
-                best_makespan_history.append(best.makespan)
-                no_improvement_count = 0
-                
-                print(f"Iter {iter}: New best = {best.makespan:.2f} hours "
-                      f"(improved by {improvement:.2f}h)")
+        found_best = False
+        found_better = False
+        for cand in batch:
+            # Batched candidates bring their route completions; their solution is
+            # only rebuilt when it is accepted
+            if pool is not None:
+                if cand.route_finish is None:
+                    pool.add_solution(cand.solution)
+                elif cand.makespan < float('inf'):
+                    pool.add_routes(cand.routes, cand.route_finish)
+
+            # Acceptance criterion (Simulated Annealing)
+            delta = cand.makespan - current.makespan
+
+            accept = False
+            if chosen is not None and cand is not chosen:
+                outcome = REJECTED
+            elif delta < 0:
+                # Improvement
+                new_sol = cand.solution
+                current = new_sol
+                outcome = IMPROVED
+                accept = True
+
+                if new_sol.makespan < best.makespan:
+                    improvement = best.makespan - new_sol.makespan
+                    best = new_sol.copy()
+                    best_makespan_history.append(best.makespan)
+                    found_best = True
+                    outcome = NEW_BEST
+
+                    if events.enabled(events.PROGRESS):
+                        events.emit('new_best', events.PROGRESS, iteration=iter,
+                                    makespan=float(best.makespan), improvement=float(improvement),
+                                    gap=gap(best.makespan, bound),
+                                    destroy=cand.destroy.__name__, repair=cand.repair.__name__)
+
+            elif random.random() < temperature.acceptance(delta):
+                # Accept worse solution
+                current = cand.solution
+                outcome = ACCEPTED
+                accept = True
             else:
-                no_improvement_count += 1
-                
-        elif random.random() < math.exp(-delta / temp):
-            # Accept worse solution
-            current = new_sol
-            weights_destroy[destroy_idx] += params.scores[2]
-            weights_repair[repair_idx] += params.scores[2]
-            accept = True
-            no_improvement_count += 1
+                outcome = REJECTED
+
+            if cand.makespan < best.makespan:
+                found_better = True
+            if elite is not None and accept:
+                elite.add(current)
+
+            # Every candidate scores its operators, accepted or not
+            destroy_weights.reward(destroy_ops.index(cand.destroy), outcome, cand.destroy_seconds)
+            repair_weights.reward(repair_ops.index(cand.repair), outcome, cand.repair_seconds)
+
+            if events.enabled(events.DEBUG):
+                events.emit('operator', events.DEBUG, iteration=iter,
+                            destroy=cand.destroy.__name__, repair=cand.repair.__name__,
+                            removed=cand.removed, outcome=outcome, delta=float(delta),
+                            destroy_seconds=cand.destroy_seconds, repair_seconds=cand.repair_seconds)
+
+        if found_best:
+            no_improvement_count = 0
         else:
             no_improvement_count += 1
+        if found_better:
+            iters_since_best = 0
+        else:
+            iters_since_best += 1
+
+        destroy_weights.end_iteration(iter)
+        repair_weights.end_iteration(iter)
 
         # Cool down
-        temp *= params.cooling_rate
+        temperature.update(progress(iter))
 
         # Periodic reporting
-        if (iter + 1) % 100 == 0:
-            elapsed = time.time() - start_time
-            print(f"Iter {iter + 1}: Best = {best.makespan:.2f}, "
-                  f"Current = {current.makespan:.2f}, "
-                  f"Temp = {temp:.2f}, "
-                  f"DestroyRate = {destroy_rate:.2f}, "
-                  f"Time = {elapsed:.1f}s")
-            
-            # Normalize weights periodically
-            if sum(weights_destroy) > 100:
-                weights_destroy = [w / sum(weights_destroy) * 10 for w in weights_destroy]
-            if sum(weights_repair) > 100:
-                weights_repair = [w / sum(weights_repair) * 10 for w in weights_repair]
+        if (iter + 1) % 100 == 0 and events.enabled(events.ITERATION):
+            events.emit('iteration', events.ITERATION, iteration=iter + 1,
+                        best=float(best.makespan), current=float(current.makespan),
+                        gap=gap(best.makespan, bound), temperature=temperature.temp,
+                        destroy_rate=destroy_rate, elapsed=time.time() - start_time)
+
+        # Periodic path relinking from the best towards the most different elite
+        if elite is not None and len(elite) > 1 and (iter + 1) % params.relink_interval == 0:
+            relinked = path_relink(best, elite.most_distant(best), params.relink_candidates)
+            elite.add(relinked)
+            if relinked.makespan < best.makespan:
+                events.emit('relink', events.PROGRESS, iteration=iter,
+                            previous=float(best.makespan), makespan=float(relinked.makespan))
+                best = relinked.copy()
+                best_makespan_history.append(best.makespan)
+                current = relinked
+                iters_since_best = 0
+
+        # Periodic recombination of pooled routes; frozen prefixes (online mode)
+        # tie routes to their trucks, so it is skipped there
+        if (pool is not None and (iter + 1) % params.recombine_interval == 0
+                and not any(current.frozen)):
+            recombined = pool.recombine(current, params.recombine_nodes)
+            if recombined is not None:
+                current = recombined
+                if elite is not None:
+                    elite.add(current)
+                if current.makespan < best.makespan:
+                    events.emit('recombine', events.PROGRESS, iteration=iter,
+                                previous=float(best.makespan), makespan=float(current.makespan))
+                    best = current.copy()
+                    best_makespan_history.append(best.makespan)
+                    iters_since_best = 0
 
         # Restart mechanism - if stuck, restart from best
-        if no_improvement_count > 200:
-            print(f"Iter {iter}: No improvement for 200 iters, restarting from best...")
+        if iters_since_best > 200:
             current = best.copy()
-            temp = params.temp_start * 0.5  # Lower temperature
+            if elite is not None and len(elite) > 1:
+                # Restart from the path between an elite member and the best
+                current = path_relink(elite.random_member(), best, params.relink_candidates)
+                restart_from = "relinked elite"
+                if current.makespan < best.makespan:
+                    best = current.copy()
+                    best_makespan_history.append(best.makespan)
+            else:
+                restart_from = "best"
+            reheated = temperature.reheat(progress(iter))
+            events.emit('restart', events.PROGRESS, iteration=iter, source=restart_from,
+                        makespan=float(current.makespan), temperature=reheated)
             no_improvement_count = 0
+            iters_since_best = 0
             destroy_rate = params.destroy_rate
 
-        # Early termination if solution is very good
-        if iter > 100 and best.makespan < 1.0:  # Less than 1 hour
-            print(f"Iter {iter}: Excellent solution found, early termination")
+        if params.time_limit is not None and time.time() - start_time >= params.time_limit:
+            events.emit('stop', events.PROGRESS, iteration=iter,
+                        reason=f"time limit of {params.time_limit:.1f}s reached")
+            break
+
+        if callback is not None and callback(iter, best):
+            events.emit('stop', events.PROGRESS, iteration=iter, reason="by caller")
+            break
+
+        if exact_fast_path and iter + 1 == params.exact_after:
+            # Tolerance: the solver and evaluate_solution sum the same times in a different order
+            optimal = solve_exact(instance, params, best.makespan + 1e-4)
+            if optimal is not None and optimal.makespan < best.makespan:
+                best = optimal
+            events.emit('stop', events.PROGRESS, iteration=iter, reason="solved exactly")
+            break
+
+        # Early termination once the best is provably close to optimal
+        if gap(best.makespan, bound) <= params.target_gap:
+            events.emit('stop', events.PROGRESS, iteration=iter,
+                        reason=f"gap {gap(best.makespan, bound) * 100:.2f}% to the lower bound")
             break
 
     total_time = time.time() - start_time
-    print(f"\nALNS completed in {total_time:.2f} seconds")
-    print(f"Final best makespan: {best.makespan:.2f} hours")
+    if events.enabled(events.ITERATION):
+        for family, ops, weights in (('destroy', destroy_ops, destroy_weights),
+                                     ('repair', repair_ops, repair_weights)):
+            events.emit('operator_stats', events.ITERATION, family=family,
+                        operators=[op.__name__ for op in ops], weights=list(weights.weights),
+                        calls=list(weights.calls), seconds=list(weights.total_time))
+    events.emit('alns_end', events.PROGRESS, elapsed=total_time, makespan=float(best.makespan))
+    if events.enabled(events.SUMMARY):
+        events.emit('solution', events.SUMMARY, instance=instance.filename, elapsed=total_time,
+                    **best.to_dict())
     
     return best
\ No newline at end of file
@@ -0,0 +1,114 @@
+"""Temperature schedule of the simulated annealing acceptance in alns().
+
+Makespan deltas are in hours and depend on the instance, so a fixed start
+temperature either accepts nearly every worsening or almost none. With
+Parameters.temp_start / temp_end set to None, calibrate() applies random
+destroy/repair pairs to the initial solution and sets the temperatures at
+which a worsening of the mean sampled size is accepted with probability
+start_acceptance and end_acceptance (T = -delta / ln p). Under a
+time_limit, sampling stops after CALIBRATION_SHARE of it; with no sample
+the mean worsening defaults to 1% of the makespan.
+
+With cooling_rate None the temperature follows
+
+    T = T_0 * (T_end / T_0) ** progress
+
+where progress is the spent fraction of the iteration or time budget,
+whichever is further along, so T_end is reached exactly when the budget
+runs out. A reheat (on stagnation) restarts that curve from the temperature
+at which the recently seen worsenings are accepted with probability
+reheat_acceptance, cooling to T_end over the remaining budget. A numeric
+cooling_rate keeps the plain geometric cooling per iteration.
+
+    schedule = Temperature(params)
+    mean_delta, samples = schedule.calibrate(current, destroy_ops, repair_ops, q)
+    accept = random.random() < schedule.acceptance(delta)
+"""
+import math
+import random
+import time
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+from model import Parameters
+from solution import Solution
+
+RECENT_DELTAS = 100  # Worsening deltas kept for reheating
+CALIBRATION_SHARE = 0.1  # Share of time_limit that calibration may use
+MIN_TEMPERATURE = 1e-9  # Floor of the start and end temperatures (a zero one divides by zero)
+
+
+def _floor(temp: Optional[float]) -> Optional[float]:
+    return None if temp is None else max(temp, MIN_TEMPERATURE)
+
+
+class Temperature:
+    def __init__(self, params: Parameters):
+        self.params = params
+        self.start = _floor(params.temp_start)
+        self.end = _floor(params.temp_end)
+        self.temp = self.start
+        self.recent = deque(maxlen=RECENT_DELTAS)
+
+        # Current cooling curve: from curve_start at progress curve_from to end at progress 1
+        self.curve_start = self.start
+        self.curve_from = 0.0
+
+    def calibrate(self, current: Solution, destroy_ops: List[Callable],
+                  repair_ops: List[Callable], q: int,
+                  deadline: Optional[float] = None) -> Tuple[float, int]:
+        """Set the missing temperatures from sampled deltas; returns their mean and
+        the number of samples taken (sampling stops at deadline, a time.time() value)"""
+        params = self.params
+        worse = []
+        samples = 0
+        while samples < params.calibration_samples:
+            if deadline is not None and time.time() >= deadline:
+                break
+            destroyed, removed = random.choice(destroy_ops)(current, q)
+            delta = random.choice(repair_ops)(destroyed, removed).makespan - current.makespan
+            samples += 1
+            if delta > 0 and math.isfinite(delta):
+                worse.append(delta)
+        # Without a worsening sample, fall back to 1% of the makespan
+        mean = sum(worse) / len(worse) if worse else 0.01 * current.makespan
+        self.recent.extend(worse)
+
+        if self.start is None:
+            self.start = _floor(-mean / math.log(params.start_acceptance))
+        if self.end is None:
+            self.end = _floor(-mean / math.log(params.end_acceptance))
+        self.end = min(self.end, self.start)
+        self.temp = self.curve_start = self.start
+        return mean, samples
+
+    def acceptance(self, delta: float) -> float:
+        """Probability of accepting a worsening by delta; records it for reheating"""
+        if delta > 0 and math.isfinite(delta):
+            self.recent.append(delta)
+        if self.temp <= 0:
+            # Geometric cooling (cooling_rate) can underflow to zero
+            return 0.0
+        return math.exp(-delta / self.temp)
+
+    def update(self, progress: float):
+        """Cool after an iteration; progress is the spent fraction of the budget"""
+        if self.params.cooling_rate is not None:
+            self.temp *= self.params.cooling_rate
+            return
+        progress = min(progress, 1.0)
+        span = 1.0 - self.curve_from
+        f = (progress - self.curve_from) / span if span > 0 else 1.0
+        self.temp = self.curve_start * (self.end / self.curve_start) ** f
+
+    def reheat(self, progress: float) -> float:
+        """Raise the temperature to accept the recent worsenings with reheat_acceptance"""
+        if self.recent:
+            mean = sum(self.recent) / len(self.recent)
+            level = min(-mean / math.log(self.params.reheat_acceptance), self.start)
+        else:
+            level = self.start
+        self.temp = max(self.temp, level)
+        self.curve_start = self.temp
+        self.curve_from = min(progress, 1.0)
+        return self.temp
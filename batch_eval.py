@@ -0,0 +1,164 @@
+"""Vectorized evaluation of many routes or solutions at once.
+
+Routes are packed into a padded (routes x positions) index array; padding
+points at the depot. Arrival times use the closed form of the ready-time
+recursion: without waiting a truck reaches position k at base_k (travel
+plus service so far), and every wait only shifts the rest of the route, so
+
+    arrival_k = base_k + max(0, max_{j <= k} (ready_j - base_j))
+
+which is a cumulative maximum along the route. Loads are a cumulative sum
+of load changes; a DL is valid only after its pickup on the same route.
+Drone trips follow schedule_route_drones: the D customers of a route in
+batches of M_D, meeting the truck at the first D of each batch, returning
+at max(latest ready + flight, arrival + one-way flight) unless the flight
+exceeds L_d.
+
+Results match evaluate_solution up to rounding: both time in float64 from
+Instance.travel_times, only the summation order differs. CandidateRunner
+(parallel.py) uses it for the route completions of each candidate batch.
+
+    evaluator = BatchEvaluator(instance, params)
+    makespans = evaluator.evaluate(candidate_solutions)
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from model import Instance, Parameters
+from solution import Solution
+
+
+class BatchEvaluator:
+    def __init__(self, instance: Instance, params: Parameters):
+        self.instance = instance
+        self.params = params
+        n = len(instance.customers)
+
+        self.travel = np.array(instance.travel_times(params.truck_speed))
+        # Ready times that hold the truck (D and DL); -inf elsewhere
+        self.ready = np.full(n + 1, -np.inf)
+        self.is_drone = np.zeros(n + 1, dtype=bool)
+        self.pickup = np.zeros(n + 1, dtype=np.int64)  # Pickup of each DL (0 otherwise)
+        for c in instance.customers:
+            if c.type in ('D', 'DL'):
+                self.ready[c.id] = c.ready_time
+            if c.type == 'D':
+                self.is_drone[c.id] = True
+            if c.type == 'DL':
+                self.pickup[c.id] = instance.pickup_of.get(c.id, 0)
+        self.load_change = np.asarray(instance.load_change, dtype=np.int64)
+
+        # Drone trip met at each D customer
+        self.drone_travel = np.zeros(n + 1)
+        for c in instance.customers:
+            if c.type == 'D':
+                self.drone_travel[c.id] = instance.euclidean_distance(0, c.id) / params.drone_speed
+        self.flight = self.drone_travel * 2 + params.delta_prime
+        self.drone_ready = np.where(self.is_drone, self.ready, -np.inf)
+
+    def pack(self, routes: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Padded index array (0 = depot) and route lengths"""
+        lengths = np.array([len(r) for r in routes], dtype=np.int64)
+        width = max(int(lengths.max()) if len(routes) else 0, 1)
+        idx = np.zeros((len(routes), width), dtype=np.int64)
+        for i, route in enumerate(routes):
+            idx[i, :len(route)] = route
+        return idx, lengths
+
+    def route_times(self, idx: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per position arrival, wait and load; per route completion, drone return and validity"""
+        params = self.params
+        n_routes, width = idx.shape
+        valid = np.arange(width)[None, :] < lengths[:, None]
+        rows = np.arange(n_routes)
+
+        # Arrival times: cumulative travel and service, shifted by the largest wait so far
+        prev = np.concatenate([np.zeros((n_routes, 1), dtype=np.int64), idx[:, :-1]], axis=1)
+        legs = np.where(valid, self.travel[prev, idx], 0.0)
+        base = np.cumsum(legs, axis=1) + np.arange(width)[None, :] * params.delta
+        slack = np.where(valid, self.ready[idx] - base, -np.inf)
+        shift = np.maximum(np.maximum.accumulate(slack, axis=1), 0.0)
+        arrival = base + shift
+        wait = np.diff(np.concatenate([np.zeros((n_routes, 1)), shift], axis=1), axis=1)
+
+        last_pos = np.maximum(lengths - 1, 0)
+        last = idx[rows, last_pos]
+        completion = np.where(
+            lengths > 0,
+            arrival[rows, last_pos] + params.delta + self.travel[last, 0] + params.delta_t,
+            0.0)
+
+        # Loads and capacity; the route must end empty
+        load = np.cumsum(np.where(valid, self.load_change[idx], 0), axis=1)
+        feasible = ((load.max(axis=1) <= params.M_T) & (load.min(axis=1) >= 0)
+                    & (load[rows, last_pos] == 0))
+
+        # Precedence: each DL's pickup sits earlier on the same route
+        position = np.full((n_routes, len(self.ready)), width, dtype=np.int64)
+        r_valid, k_valid = np.nonzero(valid)
+        position[r_valid, idx[r_valid, k_valid]] = k_valid
+        pickup = self.pickup[idx]
+        needs = valid & (pickup > 0)
+        before = position[rows[:, None], pickup] < np.arange(width)[None, :]
+        feasible &= ~(needs & ~before).any(axis=1)
+
+        drone_return = self._drone_returns(idx, valid, arrival)
+
+        return {'arrival': arrival, 'wait': wait, 'load': load, 'valid': valid,
+                'completion': completion, 'drone_return': drone_return, 'feasible': feasible}
+
+    def _drone_returns(self, idx: np.ndarray, valid: np.ndarray, arrival: np.ndarray) -> np.ndarray:
+        """Latest drone return per route (0 without trips)"""
+        n_routes, width = idx.shape
+        M_D = self.params.M_D
+        is_d = valid & self.is_drone[idx]
+        rank = np.cumsum(is_d, axis=1) - 1  # Order of each D among the route's deliveries
+        group = np.where(is_d, rank // M_D, 0)
+
+        n_groups = max((width + M_D - 1) // M_D, 1)
+        latest_ready = np.full((n_routes, n_groups), -np.inf)
+        r_d, k_d = np.nonzero(is_d)
+        np.maximum.at(latest_ready, (r_d, group[r_d, k_d]), self.drone_ready[idx[r_d, k_d]])
+
+        meet = is_d & (rank % M_D == 0)
+        r_m, k_m = np.nonzero(meet)
+        node = idx[r_m, k_m]
+        returns = np.maximum(latest_ready[r_m, group[r_m, k_m]] + self.flight[node],
+                             arrival[r_m, k_m] + self.drone_travel[node])
+        flown = self.flight[node] <= self.params.L_d
+
+        drone_return = np.zeros(n_routes)
+        np.maximum.at(drone_return, r_m[flown], returns[flown])
+        return drone_return
+
+    def route_completions(self, routes: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Completion time (truck or its drones, whichever is later) and validity per route"""
+        times = self.route_times(*self.pack(routes))
+        return np.maximum(times['completion'], times['drone_return']), times['feasible']
+
+    def evaluate_routes(self, solutions: List[List[List[int]]]) -> np.ndarray:
+        """Makespan per solution given as truck route lists (inf if infeasible)"""
+        if not solutions:
+            return np.zeros(0)
+        owner = np.repeat(np.arange(len(solutions)), [len(routes) for routes in solutions])
+        idx, lengths = self.pack([route for routes in solutions for route in routes])
+        times = self.route_times(idx, lengths)
+        finish = np.maximum(times['completion'], times['drone_return'])
+
+        makespan = np.zeros(len(solutions))
+        np.maximum.at(makespan, owner, finish)
+        ok = np.ones(len(solutions), dtype=bool)
+        np.logical_and.at(ok, owner, times['feasible'])
+
+        # Every customer served exactly once
+        counts = np.zeros((len(solutions), len(self.ready)), dtype=np.int64)
+        r_valid, k_valid = np.nonzero(times['valid'])
+        np.add.at(counts, (owner[r_valid], idx[r_valid, k_valid]), 1)
+        ok &= (counts[:, 1:] == 1).all(axis=1)
+
+        return np.where(ok, makespan, np.inf)
+
+    def evaluate(self, solutions: List[Solution]) -> np.ndarray:
+        """Makespan per Solution, without touching the solutions"""
+        return self.evaluate_routes([sol.truck_routes for sol in solutions])
@@ -0,0 +1,271 @@
+"""Performance regression benchmarks for the solver hot paths.
+
+Micro-benchmarks time single calls (route checks, truck timing, drone
+scheduling, every destroy and repair operator, Solution.copy) on a fixed
+solution. Macro-benchmarks run alns() with a pinned seed on representative
+instances. Every benchmark records time, peak traced memory and (macro)
+iterations per second and final makespan, and is compared against a stored
+baseline:
+
+    python benchmark.py --save-baseline        # record benchmark_baseline.json
+    python benchmark.py                        # compare, exit 1 on regressions
+    python benchmark.py --micro --tolerance 0.3
+    python benchmark.py --macro --shadow 0.2   # also cross-check fast paths (oracle.py)
+    python benchmark.py --gap 5                # alns() vs exact optimum on U_10 / U_15
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from model import Instance, Parameters
+from solution import Solution
+from initial_solution import create_initial_solution
+from evaluate import evaluate_solution, schedule_drones, calculate_truck_time, calculate_truck_timeline
+from destroy import random_removal, worst_removal, related_removal, critical_removal, string_removal
+from repair import greedy_insertion, regret_insertion, blink_insertion
+from alns import alns
+from exact import solve_exact
+from tune import instance_files
+import oracle
+
+MICRO_INSTANCE = "data/Instance/U_100_1.0_Num_1_pd.txt"
+MACRO_INSTANCES = [
+    "data/Instance/U_10_1.0_Num_1_pd.txt",
+    "data/Instance/U_20_1.0_Num_1_pd.txt",
+    "data/Instance/U_50_1.0_Num_1_pd.txt",
+    "data/Instance/U_100_1.0_Num_1_pd.txt",
+]
+SEED = 12345
+GAP_SIZES = [10, 15]  # Families small enough for exact.py
+
+
+def peak_memory(fn: Callable) -> float:
+    """Peak traced memory of one call in KiB"""
+    random.seed(SEED)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def time_call(fn: Callable, min_time: float, repeat: int) -> float:
+    """Best per-call time in seconds over repeat rounds of at least min_time each"""
+    best = float('inf')
+    for _ in range(repeat):
+        random.seed(SEED)
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def micro_benchmarks(min_time: float, repeat: int) -> Dict[str, Dict]:
+    instance = Instance(MICRO_INSTANCE)
+    params = Parameters()
+    random.seed(SEED)
+    sol = create_initial_solution(instance, params)
+    route = max(sol.truck_routes, key=len)
+    truck_id = sol.truck_routes.index(route)
+    q = max(1, int(len(instance.customers) * params.destroy_rate))
+
+    def check_route():
+        sol._feasibility_cache.clear()  # Time the check, not the cache hit
+        sol.check_truck_route(truck_id, route)
+
+    cases = {
+        'check_truck_route': check_route,
+        'calculate_truck_time': lambda: calculate_truck_time(sol, truck_id, route),
+        'calculate_truck_timeline': lambda: calculate_truck_timeline(sol, truck_id),
+        'schedule_drones': lambda: schedule_drones(sol),
+        'evaluate_solution': lambda: evaluate_solution(sol.copy()),
+        'solution_copy': sol.copy,
+    }
+    for op in (random_removal, worst_removal, related_removal, critical_removal, string_removal):
+        cases[op.__name__] = (lambda op=op: op(sol, q))
+
+    # Repair operators start from the same destroyed solution every call
+    random.seed(SEED)
+    destroyed, removed = random_removal(sol, q)
+    for op in (greedy_insertion, regret_insertion, blink_insertion):
+        cases[op.__name__] = (lambda op=op: op(destroyed, removed))
+
+    results = {}
+    for name, fn in cases.items():
+        seconds = time_call(fn, min_time, repeat)
+        results[f"micro/{name}"] = {
+            'seconds': seconds,
+            'peak_kib': peak_memory(fn),
+        }
+        print(f"  {name:28s} {seconds * 1e6:12.1f} us/call")
+    return results
+
+
+def run_alns(instance: Instance, iterations: int, params: Parameters = None) -> Dict:
+    params = params or Parameters()
+    params.max_iterations = iterations
+    params.seed = SEED
+    count = [0]
+
+    def callback(iteration, best):
+        count[0] = iteration + 1
+        return False
+
+    start = time.perf_counter()
+    best = alns(instance, params, callback)
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'iterations': count[0], 'makespan': float(best.makespan)}
+
+
+def macro_benchmarks(iterations: int, memory: bool) -> Dict[str, Dict]:
+    results = {}
+    for path in MACRO_INSTANCES:
+        instance = Instance(path)
+        run = run_alns(instance, iterations)
+        record = {
+            'seconds': run['seconds'],
+            'iterations_per_second': run['iterations'] / run['seconds'],
+            'makespan': run['makespan'],
+        }
+        if memory:
+            # Separate traced run: tracemalloc would distort the timing above
+            record['peak_kib'] = peak_memory(lambda: run_alns(instance, iterations))
+        name = os.path.basename(path).replace('_pd.txt', '')
+        results[f"macro/{name}"] = record
+        print(f"  {name:28s} {run['seconds']:8.2f} s  "
+              f"{record['iterations_per_second']:8.1f} it/s  makespan {run['makespan']:.4f}")
+    return results
+
+
+def gap_report(iterations: int, per_family: int) -> Dict[str, Dict]:
+    """Optimality gap of pinned-seed alns() runs against the exact solver"""
+    results = {}
+    for size in GAP_SIZES:
+        for path in instance_files(size)[:per_family]:
+            instance = Instance(path)
+            params = Parameters()
+            params.exact_max_customers = 0  # Measure the search, not its exact fast path
+            run = run_alns(instance, iterations, params)
+            optimal = solve_exact(instance, params, run['makespan'] + 1e-4)
+            optimum = float(optimal.makespan) if optimal is not None else run['makespan']
+            gap = max(0.0, run['makespan'] / optimum - 1) if optimum > 0 else 0.0
+            name = os.path.basename(path).replace('_pd.txt', '')
+            results[f"gap/{name}"] = {'makespan': run['makespan'], 'optimal': optimum, 'gap': gap}
+            print(f"  {name:28s} alns {run['makespan']:8.4f}  optimal {optimum:8.4f}  gap {gap * 100:6.2f}%")
+
+    gaps = [r['gap'] for r in results.values()]
+    if gaps:
+        print(f"  mean gap {sum(gaps) / len(gaps) * 100:.2f}%, optimal in "
+              f"{sum(g < 1e-6 for g in gaps)}/{len(gaps)} runs")
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float,
+            memory_tolerance: float) -> List[str]:
+    """Regressions of results against baseline, as printable lines"""
+    regressions = []
+    for name, record in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+
+        checks = [('seconds', tolerance, True), ('peak_kib', memory_tolerance, True),
+                  ('iterations_per_second', tolerance, False)]
+        for metric, tol, lower_is_better in checks:
+            if metric not in record or metric not in base or base[metric] <= 0:
+                continue
+            ratio = record[metric] / base[metric]
+            worse = ratio > 1 + tol if lower_is_better else ratio < 1 - tol
+            if worse:
+                regressions.append(f"{name}: {metric} {base[metric]:.6g} -> {record[metric]:.6g} "
+                                   f"({(ratio - 1) * 100:+.1f}%)")
+
+        # Pinned seeds: a different makespan means the search trajectory changed
+        if 'makespan' in base and record.get('makespan', 0) > base['makespan'] * (1 + 1e-6):
+            regressions.append(f"{name}: makespan {base['makespan']:.4f} -> {record['makespan']:.4f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solver performance benchmarks")
+    parser.add_argument('--micro', action='store_true', help="Only micro-benchmarks")
+    parser.add_argument('--macro', action='store_true', help="Only macro-benchmarks")
+    parser.add_argument('--iterations', type=int, default=200, help="ALNS iterations per macro run")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds per micro round")
+    parser.add_argument('--repeat', type=int, default=3, help="Micro rounds (best is kept)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip traced macro runs")
+    parser.add_argument('--shadow', type=float, default=0.0,
+                        help="Also shadow-check this fraction of fast-path results in a macro pass")
+    parser.add_argument('--gap', type=int, default=0, metavar='N',
+                        help="Also report optimality gaps on N instances per U_10 / U_15 family")
+    parser.add_argument('--baseline', default="benchmark_baseline.json")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown")
+    parser.add_argument('--memory-tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    run_micro = args.micro or not args.macro
+    run_macro = args.macro or not args.micro
+
+    results = {}
+    if run_micro:
+        print("Micro-benchmarks:")
+        results.update(micro_benchmarks(args.min_time, args.repeat))
+    if run_macro:
+        print("Macro-benchmarks:")
+        results.update(macro_benchmarks(args.iterations, not args.no_memory))
+
+    if args.gap > 0:
+        print("Optimality gaps:")
+        results.update(gap_report(args.iterations, args.gap))
+
+    if args.shadow > 0:
+        # Separate pass: the reference code would distort the timings above
+        print(f"Shadow oracle pass (sample rate {args.shadow}):")
+        with oracle.shadow(args.shadow) as shadow_oracle:
+            for path in MACRO_INSTANCES:
+                run_alns(Instance(path), args.iterations)
+        shadow_oracle.report()
+        if shadow_oracle.mismatches:
+            sys.exit(1)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
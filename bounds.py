@@ -0,0 +1,96 @@
+"""Lower bounds on the makespan.
+
+ready_return_bound: every customer must be reached (D and DL customers not
+before their ready time, a DL only after its pickup), served and left for
+the depot.
+
+mst_bound: the truck tours together connect the depot and all customers,
+so their total travel is at least the minimum spanning tree; the busiest of
+num_trucks trucks carries at least its share of that travel and of the
+service times.
+
+drone_bound: a drone trip leaves no earlier than the ready time of its
+items and flies at least the shortest round trip. Trips longer than L_d are
+dropped by the scheduler instead of delaying the makespan, so the bound
+only applies when every possible meeting point is within endurance.
+
+gap(makespan, bound) is the share of the makespan not yet proven optimal.
+"""
+import math
+from typing import Dict
+
+import numpy as np
+
+from model import Instance, Parameters
+
+
+def ready_return_bound(instance: Instance, params: Parameters) -> float:
+    dist = instance.dist_matrix
+    speed = params.truck_speed
+    bound = 0.0
+    for c in instance.customers:
+        arrival = float(dist[0][c.id]) / speed
+        if c.type == 'DL':
+            p_id = instance.pickup_of.get(c.id)
+            if p_id is not None:
+                arrival = (float(dist[0][p_id]) + float(dist[p_id][c.id])) / speed + params.delta
+        if c.type in ('D', 'DL'):
+            arrival = max(arrival, c.ready_time)
+        finish = arrival + params.delta + float(dist[c.id][0]) / speed + params.delta_t
+        bound = max(bound, finish)
+    return bound
+
+
+def mst_length(dist: np.ndarray) -> float:
+    """Prim's algorithm on a dense distance matrix"""
+    n = len(dist)
+    if n < 2:
+        return 0.0
+    in_tree = np.zeros(n, dtype=bool)
+    in_tree[0] = True
+    nearest = dist[0].astype(np.float64)
+    total = 0.0
+    for _ in range(n - 1):
+        candidates = np.where(in_tree, np.inf, nearest)
+        j = int(np.argmin(candidates))
+        total += candidates[j]
+        in_tree[j] = True
+        nearest = np.minimum(nearest, dist[j])
+    return float(total)
+
+
+def mst_bound(instance: Instance, params: Parameters) -> float:
+    n = len(instance.customers)
+    if n == 0:
+        return 0.0
+    work = mst_length(instance.dist_matrix) / params.truck_speed + n * params.delta + params.delta_t
+    return work / params.num_trucks
+
+
+def drone_bound(instance: Instance, params: Parameters) -> float:
+    deliveries = [c for c in instance.customers if c.type == 'D']
+    if not deliveries:
+        return 0.0
+    flights = [2 * instance.euclidean_distance(0, c.id) / params.drone_speed + params.delta_prime
+               for c in deliveries]
+    if max(flights) > params.L_d:
+        return 0.0
+    return max(c.ready_time for c in deliveries) + min(flights)
+
+
+def lower_bounds(instance: Instance, params: Parameters) -> Dict[str, float]:
+    return {
+        'ready_return': ready_return_bound(instance, params),
+        'mst': mst_bound(instance, params),
+        'drone': drone_bound(instance, params),
+    }
+
+
+def lower_bound(instance: Instance, params: Parameters) -> float:
+    return max(lower_bounds(instance, params).values())
+
+
+def gap(makespan: float, bound: float) -> float:
+    if makespan <= 0 or math.isinf(makespan):
+        return math.inf if math.isinf(makespan) else 0.0
+    return max(0.0, (makespan - bound) / makespan)
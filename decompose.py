@@ -0,0 +1,131 @@
+"""Rolling-horizon decomposition for large instances.
+
+Units (D customers and P-DL pairs) are ordered by ready time and cut into
+windows of window_size units. Each window's subproblem also contains the
+first overlap units of the next window, so its routes do not end as if the
+day stopped there; those lookahead customers are dropped again when
+stitching. Windows are solved with alns() (optionally in parallel), their
+routes are appended window by window to the truck that can start them
+earliest, drone trips are rescheduled on the stitched routes, and a short
+alns() pass polishes the result. With a fixed window size the total work
+grows linearly with the number of windows.
+
+    python decompose.py data/Instance/U_100_1.0_Num_1_pd.txt --window 30 --workers 4
+"""
+import argparse
+import copy
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import evaluate_solution, calculate_truck_time
+from alns import alns
+import events
+
+
+def ready_units(instance: Instance) -> List[List[int]]:
+    """D customers and P-DL pairs, sorted by the ready time they wait for"""
+    units = []
+    for cust in instance.customers:
+        if cust.type == 'D':
+            units.append([cust.id])
+        elif cust.type == 'P':
+            dl_id = instance.pd_pairs.get(cust.id)
+            units.append([cust.id, dl_id] if dl_id is not None else [cust.id])
+        elif cust.type == 'DL' and cust.id not in instance.pickup_of:
+            units.append([cust.id])
+    units.sort(key=lambda u: max(instance.customers[c - 1].ready_time for c in u))
+    return units
+
+
+def solve_window(instance: Instance, cust_ids: List[int], params: Parameters) -> List[List[int]]:
+    """Truck routes (original customer ids) of the subproblem over cust_ids"""
+    sub = instance.subset(cust_ids)
+    best = alns(sub, params)
+    return [[cust_ids[c - 1] for c in route] for route in best.truck_routes]
+
+
+def stitch(instance: Instance, params: Parameters, windows: List[List[List[int]]]) -> Solution:
+    """Append each window's routes to the trucks that can start them earliest"""
+    sol = Solution(instance, params)
+    for routes in windows:
+        busy = set()
+        for route in sorted((r for r in routes if r), key=len, reverse=True):
+            def start_time(truck_id):
+                current = sol.truck_routes[truck_id]
+                return calculate_truck_time(sol, truck_id, current + route[:1])
+
+            free = [t for t in range(params.num_trucks) if t not in busy]
+            truck_id = min(free or range(params.num_trucks), key=start_time)
+            sol.truck_routes[truck_id].extend(route)
+            busy.add(truck_id)
+
+    sol.makespan = evaluate_solution(sol)
+    return sol
+
+
+def rolling_horizon(instance: Instance, params: Parameters, window_size: int = 30,
+                    overlap: int = 5, window_iterations: int = 300, polish_iterations: int = 200,
+                    workers: int = 1) -> Solution:
+    units = ready_units(instance)
+    cores = [units[i:i + window_size] for i in range(0, len(units), window_size)]
+
+    jobs = []
+    for k, core in enumerate(cores):
+        lookahead = cores[k + 1][:overlap] if k + 1 < len(cores) else []
+        cust_ids = [c for unit in core + lookahead for c in unit]
+        sub_params = copy.copy(params)
+        sub_params.max_iterations = window_iterations
+        if params.seed is not None:
+            sub_params.seed = params.seed + k
+        jobs.append((cust_ids, sub_params))
+
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(solve_window, instance, ids, p) for ids, p in jobs]
+            results = [f.result() for f in futures]
+    else:
+        results = [solve_window(instance, ids, p) for ids, p in jobs]
+
+    # Keep each window's own customers; lookahead ones belong to the next window
+    windows = []
+    for core, routes in zip(cores, results):
+        own = {c for unit in core for c in unit}
+        windows.append([[c for c in route if c in own] for route in routes])
+
+    stitched = stitch(instance, params, windows)
+    events.emit('stitched', events.PROGRESS, windows=len(cores), makespan=float(stitched.makespan))
+    if polish_iterations <= 0:
+        return stitched
+
+    polish_params = copy.copy(params)
+    polish_params.max_iterations = polish_iterations
+    return alns(instance, polish_params, initial=stitched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-horizon ALNS for large instances")
+    parser.add_argument('instance')
+    parser.add_argument('--window', type=int, default=30, help="Units (D customers or P-DL pairs) per window")
+    parser.add_argument('--overlap', type=int, default=5, help="Lookahead units from the next window")
+    parser.add_argument('--window-iterations', type=int, default=300)
+    parser.add_argument('--polish-iterations', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    params = Parameters()
+    params.seed = args.seed
+
+    instance = Instance(args.instance)
+
+    start = time.time()
+    best = rolling_horizon(instance, params, args.window, args.overlap, args.window_iterations,
+                           args.polish_iterations, args.workers)
+    print(f"Makespan: {best.makespan:.2f} hours ({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,103 +6,95 @@ from typing import List, Dict, Tuple, Set
 import time
 
 from solution import Solution
-from evaluate import calculate_truck_time
+from evaluate import RoutePlan, calculate_truck_time
+
+def _pop_random(items: list):
+    """Remove and return a random element in O(1) (the order is not kept)"""
+    i = random.randrange(len(items))
+    items[i], items[-1] = items[-1], items[i]
+    return items.pop()
 
 def random_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
     """Randomly remove q customers (respecting P-DL pairs)"""
     new_sol = sol.copy()
+    instance = new_sol.instance
+    index = new_sol.customer_index()
 
-    # Collect all customers, marking P-DL pairs
-    all_customers = []
-    for route in new_sol.truck_routes:
-        all_customers.extend(route)
-
-    if len(all_customers) == 0:
+    if not index:
         return new_sol, []
 
     # Separate into independent customers and pairs
     independent = []  # Type 'D' customers
     pairs_to_remove = []  # (P, DL) tuples
-    already_in_pair = set()
+    frozen = new_sol.frozen_customers()  # Frozen customers stay put
+
+    for route in new_sol.truck_routes:
+        for cust_id in route:
+            if cust_id in frozen:
+                continue
+
+            cust = instance.customers[cust_id - 1]
+
+            if cust.type == 'D':
+                independent.append(cust_id)
+            elif cust.type == 'P':
+                # Find corresponding DL
+                dl_id = instance.pd_pairs.get(cust_id)
+                if dl_id and dl_id in index:
+                    pairs_to_remove.append((cust_id, dl_id))
 
-    for cust_id in all_customers:
-        if cust_id in already_in_pair:
-            continue
-            
-        cust = new_sol.instance.customers[cust_id - 1]
-        
-        if cust.type == 'D':
-            independent.append(cust_id)
-        elif cust.type == 'P':
-            # Find corresponding DL
-            dl_id = new_sol.instance.pd_pairs.get(cust_id)
-            if dl_id and dl_id in all_customers:
-                pairs_to_remove.append((cust_id, dl_id))
-                already_in_pair.add(cust_id)
-                already_in_pair.add(dl_id)
-
-    # Determine how many to remove
-    total_units = len(independent) + len(pairs_to_remove)
-    q_units = min(q, total_units)
-    
     removed = []
     
     # Remove pairs and independent customers
     while len(removed) < q and (independent or pairs_to_remove):
         if random.random() < 0.5 and pairs_to_remove:
             # Remove a pair
-            pair = random.choice(pairs_to_remove)
-            removed.extend(pair)
-            pairs_to_remove.remove(pair)
+            removed.extend(_pop_random(pairs_to_remove))
         elif independent:
             # Remove an independent customer
-            cust = random.choice(independent)
-            removed.append(cust)
-            independent.remove(cust)
+            removed.append(_pop_random(independent))
         elif pairs_to_remove:
             # No independent left, remove pair
-            pair = random.choice(pairs_to_remove)
-            removed.extend(pair)
-            pairs_to_remove.remove(pair)
+            removed.extend(_pop_random(pairs_to_remove))
 
-    # Remove from routes
-    for truck_id in range(len(new_sol.truck_routes)):
-        new_sol.truck_routes[truck_id] = [
-            c for c in new_sol.truck_routes[truck_id] if c not in removed
-        ]
+    new_sol.remove_customers(set(removed), index)
 
     return new_sol, removed
 
 def worst_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
     """Remove q customers with highest cost (respecting P-DL pairs)"""
     new_sol = sol.copy()
+    instance = new_sol.instance
+    index = new_sol.customer_index()
 
     # Calculate removal cost for each customer/pair
     costs = []
-    
+    frozen = new_sol.frozen_customers()
+
     for truck_id, route in enumerate(new_sol.truck_routes):
+        if not route:
+            continue
+        before = calculate_truck_time(new_sol, truck_id, route)
+
         for i, cust_id in enumerate(route):
-            cust = new_sol.instance.customers[cust_id - 1]
+            if cust_id in frozen:
+                continue
+            cust = instance.customers[cust_id - 1]
             
             if cust.type == 'D':
                 # Independent customer - calculate removal cost
-                before = calculate_truck_time(new_sol, truck_id, route)
                 test_route = route[:i] + route[i+1:]
                 after = calculate_truck_time(new_sol, truck_id, test_route)
-                saving = before - after
-                costs.append((saving, [cust_id], truck_id))
+                costs.append((before - after, [cust_id], truck_id))
                 
             elif cust.type == 'P':
                 # Must remove pair together
-                dl_id = new_sol.instance.pd_pairs.get(cust_id)
-                if dl_id and dl_id in route:
-                    dl_idx = route.index(dl_id)
-                    before = calculate_truck_time(new_sol, truck_id, route)
-                    # Remove both P and DL
-                    test_route = [c for c in route if c not in [cust_id, dl_id]]
+                dl_id = instance.pd_pairs.get(cust_id)
+                dl_truck, j = index.get(dl_id, (None, None))
+                if dl_truck == truck_id and j > i:
+                    test_route = route[:i] + route[i+1:j] + route[j+1:]
                     after = calculate_truck_time(new_sol, truck_id, test_route)
-                    saving = before - after
-                    costs.append((saving, [cust_id, dl_id], truck_id))
+                    costs.append((before - after, [cust_id, dl_id], truck_id))
 
     if not costs:
         return new_sol, []
@@ -124,65 +116,60 @@ def worst_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
         if len(removed) >= q:
             break
 
-    # Remove from routes
-    for truck_id in range(len(new_sol.truck_routes)):
-        new_sol.truck_routes[truck_id] = [
-            c for c in new_sol.truck_routes[truck_id] if c not in removed
-        ]
+    new_sol.remove_customers(removed_set, index)
 
     return new_sol, removed
 
 def related_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
     """Remove q related customers by distance (respecting P-DL pairs)"""
     new_sol = sol.copy()
+    instance = new_sol.instance
+    index = new_sol.customer_index()
 
-    all_customers = []
-    for route in new_sol.truck_routes:
-        all_customers.extend(route)
+    frozen = new_sol.frozen_customers()
+    all_customers = [c for route in new_sol.truck_routes for c in route if c not in frozen]
 
     if len(all_customers) == 0:
         return new_sol, []
 
+    def available(cust_id):
+        return cust_id in index and cust_id not in frozen
+
     # Pick random seed customer
     seed = random.choice(all_customers)
-    seed_cust = new_sol.instance.customers[seed - 1]
+    seed_cust = instance.customers[seed - 1]
 
     removed = []
     
     # If seed is part of a pair, remove the pair
     if seed_cust.type == 'P':
-        dl_id = new_sol.instance.pd_pairs.get(seed)
-        if dl_id and dl_id in all_customers:
+        dl_id = instance.pd_pairs.get(seed)
+        if dl_id and available(dl_id):
             removed = [seed, dl_id]
     elif seed_cust.type == 'DL':
-        # Find corresponding P
-        for p_id, d_id in new_sol.instance.pd_pairs.items():
-            if d_id == seed:
-                if p_id in all_customers:
-                    removed = [p_id, seed]
-                break
+        p_id = instance.pickup_of.get(seed)
+        if p_id and available(p_id):
+            removed = [p_id, seed]
     else:
         removed = [seed]
+    removed_set = set(removed)
 
     # Find nearest customers to seed
+    seed_dist = instance.dist_matrix[seed]
     distances = []
     for cust_id in all_customers:
-        if cust_id not in removed:
-            dist = sol.instance.dist_matrix[seed][cust_id]
-            cust = new_sol.instance.customers[cust_id - 1]
+        if cust_id not in removed_set:
+            dist = seed_dist[cust_id]
+            cust = instance.customers[cust_id - 1]
             
             if cust.type == 'P':
                 # Consider pair distance
-                dl_id = new_sol.instance.pd_pairs.get(cust_id)
+                dl_id = instance.pd_pairs.get(cust_id)
                 distances.append((dist, [cust_id, dl_id] if dl_id else [cust_id]))
             elif cust.type == 'DL':
                 # Check if P already removed
-                p_id = None
-                for pid, did in new_sol.instance.pd_pairs.items():
-                    if did == cust_id:
-                        p_id = pid
-                        break
-                if p_id not in removed:
+                p_id = instance.pickup_of.get(cust_id)
+                if p_id not in removed_set:
                     distances.append((dist, [p_id, cust_id] if p_id else [cust_id]))
             else:
                 distances.append((dist, [cust_id]))
@@ -193,13 +180,150 @@ def related_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
     for dist, customers in distances:
         if len(removed) >= q:
             break
-        if all(c not in removed for c in customers):
+        if all(c not in removed_set for c in customers):
             removed.extend(customers)
+            removed_set.update(customers)
+
+    new_sol.remove_customers(removed_set, index)
+
+    return new_sol, removed
+
+def critical_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
+    """Remove q customers from the routes that set the makespan (respecting P-DL pairs)"""
+    # Everything up to the removal only reads sol: the fallbacks copy it themselves
+    instance = sol.instance
+    routes = sol.truck_routes
+
+    if len(routes) < 2 or not any(routes):
+        return random_removal(sol, q)
+
+    # Completion of each truck and its drones: a drone-bound route can set the makespan
+    route_times = [RoutePlan(sol, t).final for t in range(len(routes))]
+
+    # Critical trucks: the bottleneck route and trucks resupplied by late drone trips
+    makespan = sol.makespan if sol.makespan < float('inf') else max(route_times)
+    late = 0.95 * makespan
+    bottleneck = max(range(len(routes)), key=lambda t: route_times[t])
+    critical = {bottleneck}
+    late_items = []
+    for trip in sol.drone_trips:
+        if trip.return_time >= late:
+            critical.add(trip.meet_truck)
+            late_items.extend(trip.items)
+    critical = {t for t in critical if routes[t]}
+
+    slack_trucks = [t for t in range(len(routes)) if t not in critical]
+    if not slack_trucks:
+        return random_removal(sol, q)
 
-    # Remove from routes
-    for truck_id in range(len(new_sol.truck_routes)):
-        new_sol.truck_routes[truck_id] = [
-            c for c in new_sol.truck_routes[truck_id] if c not in removed
-        ]
+    # Units (D customers and P-DL pairs) on the critical routes
+    units = []
+    frozen = sol.frozen_customers()
+    index = sol.customer_index()
+    for truck_id in critical:
+        route = routes[truck_id]
+        for cust_id in route:
+            if cust_id in frozen:
+                continue
+            cust = instance.customers[cust_id - 1]
+            if cust.type == 'D':
+                units.append([cust_id])
+            elif cust.type == 'P':
+                dl_id = instance.pd_pairs.get(cust_id)
+                if dl_id and index.get(dl_id, (None,))[0] == truck_id:
+                    units.append([cust_id, dl_id])
+
+    if not units:
+        return random_removal(sol, q)
+
+    # Seed near the slackest route so the repair can move the cluster there
+    slack_truck = min(slack_trucks, key=lambda t: route_times[t])
+    slack_nodes = routes[slack_truck] or [0]
+    dist = instance.dist_matrix
+    units.sort(key=lambda u: min(dist[u[0]][n] for n in slack_nodes))
+    seed = units[int(len(units) * random.random() ** 3)][0]
+
+    # Customers on late drone trips first, then the cluster around the seed
+    late_set = set(late_items)
+    units.sort(key=lambda u: (u[0] not in late_set, dist[seed][u[0]]))
+
+    removed = []
+    while units and len(removed) < q:
+        # Randomized pick biased towards the front of the list
+        unit = units.pop(int(len(units) * random.random() ** 3))
+        removed.extend(unit)
+
+    new_sol = sol.copy()
+    new_sol.remove_customers(set(removed), index)
+
+    return new_sol, removed
+
+def string_removal(sol: Solution, q: int) -> Tuple[Solution, List[int]]:
+    """Slack induced string removal (SISR): cut strings of consecutive customers
+    out of the routes nearest a random seed (respecting P-DL pairs)"""
+    new_sol = sol.copy()
+    instance = new_sol.instance
+    params = new_sol.params
+    routes = new_sol.truck_routes
+    index = new_sol.customer_index()
+    frozen = new_sol.frozen_customers()
+
+    candidates = [c for c in index if c not in frozen]
+    if not candidates:
+        return new_sol, []
 
-    return new_sol, removed
\ No newline at end of file
+    # Number of strings from the average open route length
+    open_lens = [len(r) - new_sol.frozen[t] for t, r in enumerate(routes) if len(r) > new_sol.frozen[t]]
+    ls_max = min(params.max_string_length, sum(open_lens) / len(open_lens))
+    ks_max = 4 * q / (1 + ls_max) - 1
+    n_strings = max(1, int(random.uniform(1, ks_max + 1)))
+
+    seed = random.choice(candidates)
+    removed = []
+    removed_set = set()
+    ruined = set()
+
+    def remove(cust_id):
+        if cust_id in removed_set or cust_id in frozen or cust_id not in index:
+            return
+        partner = new_sol.get_pd_pair(cust_id)
+        unit = [cust_id] if partner is None or partner not in index else [cust_id, partner]
+        for c in unit:
+            if c not in removed_set:
+                removed.append(c)
+                removed_set.add(c)
+
+    for cust_id in np.argsort(instance.dist_matrix[seed]).tolist():
+        if len(ruined) >= n_strings or len(removed) >= q:
+            break
+        if cust_id not in index or cust_id in frozen or cust_id in removed_set:
+            continue
+        truck_id, pos = index[cust_id]
+        if truck_id in ruined:
+            continue
+
+        route = routes[truck_id]
+        lo = new_sol.frozen[truck_id]
+        open_len = len(route) - lo
+        length = int(random.uniform(1, min(open_len, ls_max) + 1))
+
+        # Split string: a run of kept customers inside a longer string
+        kept = 0
+        if length < open_len and random.random() < params.split_rate:
+            kept = 1
+            while length + kept < open_len and random.random() > params.split_depth:
+                kept += 1
+
+        span = length + kept
+        start = random.randint(max(lo, pos - span + 1), min(pos, len(route) - span))
+        window = route[start:start + span]
+        if kept:
+            k = random.randint(0, length)
+            window = window[:k] + window[k + kept:]
+        for c in window:
+            remove(c)
+        ruined.add(truck_id)
+
+    new_sol.remove_customers(removed_set, index)
+
+    return new_sol, removed
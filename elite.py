@@ -0,0 +1,222 @@
+import random
+from typing import List, Optional
+
+from solution import Solution
+from evaluate import evaluate_solution, route_makespan
+
+
+def solution_edges(sol: Solution) -> frozenset:
+    """Directed truck edges of a solution, depot legs included"""
+    edges = set()
+    for route in sol.truck_routes:
+        prev = 0
+        for cust_id in route:
+            edges.add((prev, cust_id))
+            prev = cust_id
+        if route:
+            edges.add((prev, 0))
+    return frozenset(edges)
+
+
+def edge_distance(a: frozenset, b: frozenset) -> float:
+    """Share of edges the two solutions do not have in common (0 = same routes)"""
+    union = len(a | b)
+    return 1.0 - len(a & b) / union if union else 0.0
+
+
+class ElitePool:
+    """Bounded pool of good and mutually different solutions.
+
+    A candidate closer than min_distance to a member can only replace that
+    member (if it is better); otherwise it fills a free slot or replaces the
+    worst member if it beats it.
+    """
+
+    def __init__(self, capacity: int, min_distance: float):
+        self.capacity = capacity
+        self.min_distance = min_distance
+        self.members = []  # [(solution, edges)]
+
+    def __len__(self):
+        return len(self.members)
+
+    def add(self, sol: Solution) -> bool:
+        if sol.makespan == float('inf'):
+            return False
+
+        edges = solution_edges(sol)
+        closest = None
+        closest_dist = 1.0
+        for i, (_, member_edges) in enumerate(self.members):
+            dist = edge_distance(edges, member_edges)
+            if dist < closest_dist:
+                closest, closest_dist = i, dist
+
+        if closest is not None and closest_dist < self.min_distance:
+            if sol.makespan < self.members[closest][0].makespan:
+                self.members[closest] = (sol.copy(), edges)
+                return True
+            return False
+
+        if len(self.members) < self.capacity:
+            self.members.append((sol.copy(), edges))
+            return True
+
+        worst = max(range(len(self.members)), key=lambda i: self.members[i][0].makespan)
+        if sol.makespan < self.members[worst][0].makespan:
+            self.members[worst] = (sol.copy(), edges)
+            return True
+        return False
+
+    def most_distant(self, sol: Solution) -> Optional[Solution]:
+        """Member with the fewest edges in common with sol"""
+        if not self.members:
+            return None
+        edges = solution_edges(sol)
+        member, _ = max(self.members, key=lambda m: edge_distance(edges, m[1]))
+        return member
+
+    def random_member(self) -> Optional[Solution]:
+        return random.choice(self.members)[0] if self.members else None
+
+
+def align_routes(routes: List[List[int]], guide_routes: List[List[int]]) -> List[List[int]]:
+    """Reorder the guide's routes so guide truck i overlaps most with truck i"""
+    n = len(routes)
+    sets = [set(r) for r in routes]
+    pairs = sorted(((len(sets[i] & set(g)), i, j) for i in range(n) for j, g in enumerate(guide_routes)),
+                   reverse=True)
+    aligned = [None] * n
+    used = set()
+    for _, i, j in pairs:
+        if aligned[i] is None and j not in used:
+            aligned[i] = guide_routes[j]
+            used.add(j)
+    return [r if r is not None else [] for r in aligned]
+
+
+def path_relink(initiating: Solution, guiding: Solution, max_candidates: int = 8) -> Solution:
+    """Walk from initiating towards guiding one P-DL unit (or D customer) at a time.
+
+    Each step tries up to max_candidates units that still sit differently
+    from the guide, moves the one giving the lowest makespan (only the two
+    touched routes are re-evaluated) and fixes it. Returns the best
+    intermediate solution, fully evaluated.
+    """
+    sol = initiating.copy()
+    instance = sol.instance
+    routes = sol.truck_routes
+    guide = align_routes(routes, guiding.truck_routes)
+
+    # Units and where the guide puts them: (truck, predecessor of each customer)
+    target = {}
+    for truck_id, route in enumerate(guide):
+        prev = 0
+        for cust_id in route:
+            target[cust_id] = (truck_id, prev)
+            prev = cust_id
+    units = []
+    for cust_id in target:
+        cust = instance.customers[cust_id - 1]
+        if cust.type == 'D':
+            units.append([cust_id])
+        elif cust.type == 'P' and instance.pd_pairs.get(cust_id) in target:
+            units.append([cust_id, instance.pd_pairs[cust_id]])
+
+    route_times = [route_makespan(sol, t) for t in range(len(routes))]
+    best_makespan = max(route_times)
+    best_routes = None
+
+    while units:
+        location = {}
+        for truck_id, route in enumerate(routes):
+            prev = 0
+            for cust_id in route:
+                location[cust_id] = (truck_id, prev)
+                prev = cust_id
+
+        units = [u for u in units if any(location.get(c) != target[c] for c in u)]
+        if not units:
+            break
+
+        best_move = None
+        for unit in random.sample(units, min(max_candidates, len(units))):
+            move = _relink_move(sol, unit, location[unit[0]][0], target)
+            if move is None:
+                units.remove(unit)
+                continue
+
+            # Evaluate only the touched routes
+            saved = {t: routes[t] for t in move}
+            for t, route in move.items():
+                routes[t] = route
+            times = route_times.copy()
+            for t in move:
+                times[t] = route_makespan(sol, t)
+            for t, route in saved.items():
+                routes[t] = route
+
+            makespan = max(times)
+            if best_move is None or makespan < best_move[0]:
+                best_move = (makespan, unit, move, times)
+
+        if best_move is None:
+            break
+
+        makespan, unit, move, times = best_move
+        for t, route in move.items():
+            routes[t] = route
+        route_times = times
+        units.remove(unit)
+
+        if makespan < best_makespan:
+            best_makespan = makespan
+            best_routes = [r.copy() for r in routes]
+
+    if best_routes is None:
+        return initiating.copy()
+
+    result = initiating.copy()
+    result.truck_routes = best_routes
+    result.makespan = evaluate_solution(result)
+    return result
+
+
+def _relink_move(sol: Solution, unit: List[int], from_truck: int, target: dict):
+    """New routes {truck: route} after moving unit to its guide position, or None if infeasible"""
+    to_truck, pred = target[unit[0]]
+    unit_set = set(unit)
+    if unit_set & sol.frozen_customers():
+        return None
+    source = [c for c in sol.truck_routes[from_truck] if c not in unit_set]
+    dest = source if to_truck == from_truck else sol.truck_routes[to_truck]
+
+    pos = dest.index(pred) + 1 if pred in dest else (0 if pred == 0 else len(dest))
+    if pos < sol.frozen[to_truck]:
+        return None
+
+    sol.truck_routes[from_truck], original = source, sol.truck_routes[from_truck]
+    try:
+        state = sol.route_state(to_truck)
+        if len(unit) == 1:
+            if not state.can_insert(pos, unit[0]):
+                return None
+            new_dest = dest[:pos] + unit + dest[pos:]
+        else:
+            p_id, dl_id = unit
+            dl_pred = target[dl_id][1]
+            if dl_pred == p_id:
+                dl_pos = pos
+            elif dl_pred in dest:
+                dl_pos = max(pos, dest.index(dl_pred) + 1)
+            else:
+                dl_pos = len(dest)
+            if not state.can_insert_pair(pos, dl_pos, p_id, dl_id):
+                return None
+            new_dest = dest[:pos] + [p_id] + dest[pos:dl_pos] + [dl_id] + dest[dl_pos:]
+    finally:
+        sol.truck_routes[from_truck] = original
+
+    if to_truck == from_truck:
+        return {to_truck: new_dest}
+    return {from_truck: source, to_truck: new_dest}
@@ -1,6 +1,8 @@
+import math
 from typing import List, Dict, Tuple, Set
 import numpy as np
 
+import oracle
 from solution import Solution, DroneTrip
 
 def schedule_drones(sol: Solution) -> Solution:
@@ -8,114 +10,258 @@ def schedule_drones(sol: Solution) -> Solution:
     new_sol = sol.copy()
     new_sol.drone_trips = []
 
-    # Identify delivery customers (type 'D') that need drone resupply
-    delivery_customers = {}  # {truck_id: [(cust_id, position_in_route)]}
+    for truck_id in range(len(new_sol.truck_routes)):
+        new_sol.drone_trips.extend(schedule_route_drones(new_sol, truck_id))
 
-    for truck_id, route in enumerate(new_sol.truck_routes):
-        delivery_customers[truck_id] = []
-        for pos, cust_id in enumerate(route):
-            cust = new_sol.instance.customers[cust_id - 1]
-            if cust.type == 'D':
-                delivery_customers[truck_id].append((cust_id, pos))
+    return new_sol
 
-    # If no deliveries to resupply, return
-    total_deliveries = sum(len(v) for v in delivery_customers.values())
-    if total_deliveries == 0:
-        return new_sol
+def schedule_route_drones(sol: Solution, truck_id: int) -> List[DroneTrip]:
+    """Drone trips resupplying the delivery customers (type 'D') of one truck"""
+    trips = []
 
-    # Pre-calculate truck timelines for all trucks (avoid recalculation)
-    truck_timelines = {}
-    for truck_id in range(len(new_sol.truck_routes)):
-        if delivery_customers.get(truck_id):
-            truck_timelines[truck_id] = calculate_truck_timeline(new_sol, truck_id)
+    # Identify delivery customers (type 'D') that need drone resupply
+    customers_to_serve = []  # [(cust_id, position_in_route)]
+    for pos, cust_id in enumerate(sol.truck_routes[truck_id]):
+        cust = sol.instance.customers[cust_id - 1]
+        if cust.type == 'D':
+            customers_to_serve.append((cust_id, pos))
 
-    # Schedule drones to resupply these customers
-    for truck_id in delivery_customers:
-        if not delivery_customers[truck_id]:
-            continue
+    # If no deliveries to resupply, return
+    if not customers_to_serve:
+        return trips
 
-        truck_timeline = truck_timelines[truck_id]
-        customers_to_serve = delivery_customers[truck_id].copy()
+    truck_timeline = calculate_truck_timeline(sol, truck_id)
 
-        while customers_to_serve:
-            trip = DroneTrip()
+    while customers_to_serve:
+        trip = DroneTrip()
 
-            # Select up to M_D customers for this trip
-            batch_size = min(len(customers_to_serve), new_sol.params.M_D)
-            selected = customers_to_serve[:batch_size]
-            customers_to_serve = customers_to_serve[batch_size:]
+        # Select up to M_D customers for this trip
+        batch_size = min(len(customers_to_serve), sol.params.M_D)
+        selected = customers_to_serve[:batch_size]
+        customers_to_serve = customers_to_serve[batch_size:]
 
-            trip.items = [cust_id for cust_id, _ in selected]
-            trip.meet_truck = truck_id
-            trip.meet_node = selected[0][0]
-            meet_pos = selected[0][1]
+        trip.items = [cust_id for cust_id, _ in selected]
+        trip.meet_truck = truck_id
+        trip.meet_node = selected[0][0]
+        meet_pos = selected[0][1]
 
-            # Calculate timing
-            if meet_pos < len(truck_timeline):
-                truck_arrival = truck_timeline[meet_pos]['arrival']
+        # Calculate timing
+        if meet_pos < len(truck_timeline):
+            truck_arrival = truck_timeline[meet_pos]['arrival']
 
-                # Pre-calculate earliest ready time
-                earliest_ready = max([new_sol.instance.customers[c-1].ready_time
-                                     for c in trip.items])
+            # Pre-calculate earliest ready time
+            earliest_ready = max([sol.instance.customers[c-1].ready_time
+                                 for c in trip.items])
 
-                # Use pre-calculated euclidean distance
-                meet_dist = new_sol.instance.euclidean_distance(0, trip.meet_node)
-                drone_travel_time = meet_dist / new_sol.params.drone_speed
+            # Use pre-calculated euclidean distance
+            meet_dist = sol.instance.euclidean_distance(0, trip.meet_node)
+            drone_travel_time = meet_dist / sol.params.drone_speed
 
-                ideal_depart = truck_arrival - drone_travel_time - new_sol.params.delta_prime
-                trip.depart_time = max(earliest_ready, ideal_depart)
+            ideal_depart = truck_arrival - drone_travel_time - sol.params.delta_prime
+            trip.depart_time = max(earliest_ready, ideal_depart)
 
-                trip.flight_time = drone_travel_time * 2 + new_sol.params.delta_prime
-                trip.return_time = trip.depart_time + trip.flight_time
+            trip.flight_time = drone_travel_time * 2 + sol.params.delta_prime
+            trip.return_time = trip.depart_time + trip.flight_time
 
-                if trip.flight_time <= new_sol.params.L_d:
-                    new_sol.drone_trips.append(trip)
+            if trip.flight_time <= sol.params.L_d:
+                trips.append(trip)
 
-    return new_sol
+    return trips
 
-def calculate_truck_timeline(sol: Solution, truck_id: int) -> List[Dict]:
-    """Calculate arrival and departure times - OPTIMIZED"""
-    timeline = []
+def route_makespan(sol: Solution, truck_id: int) -> float:
+    """Completion time of one truck and the drone trips that resupply it"""
     route = sol.truck_routes[truck_id]
+    finish = calculate_truck_time(sol, truck_id, route)
+    for trip in schedule_route_drones(sol, truck_id):
+        finish = max(finish, trip.return_time)
+    return finish
 
+def route_time(instance, params, route: List[int]) -> float:
+    """Truck completion time of a route: the shared timing kernel"""
     if not route:
-        return timeline
+        return 0.0
+    travel = instance.travel_times(params.truck_speed)
+    hold = instance.hold_times
+    delta = params.delta
 
     time = 0.0
     prev = 0
-
-    # Pre-fetch parameters
-    truck_speed = sol.params.truck_speed
-    delta = sol.params.delta
-    dist_matrix = sol.instance.dist_matrix
-    customers = sol.instance.customers
-
     for cust_id in route:
-        cust = customers[cust_id - 1]
-
-        # Travel time
-        time += dist_matrix[prev][cust_id] / truck_speed
+        time += travel[prev][cust_id]
+        if time < hold[cust_id]:
+            time = hold[cust_id]  # Wait for ready time
+        time += delta
+        prev = cust_id
+    return time + travel[prev][0] + params.delta_t
 
-        # Wait for ready time
-        if cust.type in ['D', 'DL']:
-            time = max(time, cust.ready_time)
+def route_arrivals(instance, params, route: List[int]) -> List[float]:
+    """Arrival time at each customer of a route (departure = arrival + delta)"""
+    travel = instance.travel_times(params.truck_speed)
+    hold = instance.hold_times
+    delta = params.delta
 
-        arrival = time
+    arrivals = []
+    time = 0.0
+    prev = 0
+    for cust_id in route:
+        time += travel[prev][cust_id]
+        if time < hold[cust_id]:
+            time = hold[cust_id]
+        arrivals.append(time)
         time += delta
+        prev = cust_id
+    return arrivals
+
+NO_TRIP = -math.inf
+
+class RoutePlan:
+    """Truck timing and drone resupply state along one route, for insertion costs.
+
+    labels[k] is the state after the first k stops: (departure, D customers
+    the open drone batch can still take, latest return of the full batches,
+    and return by ready time, return by truck arrival and flight time of the
+    batch still filling) - the drone rule of schedule_route_drones, kept
+    incrementally as in exact.py. completion() replays only the rest of the
+    route from the label at the first insertion.
+
+    Usually the truck comes back after its drones: it waits for every D
+    customer's ready time and then still has to drive home, which takes at
+    least the direct trip. So the truck time is replayed first, and the
+    drone state only when a drone might return later: some meeting point
+    is closer to the depot for the drone than for the truck, or the latest
+    ready time plus the longest flight exceeds the truck time.
+    """
+
+    def __init__(self, sol: Solution, truck_id: int):
+        instance, params = sol.instance, sol.params
+        self.instance, self.params = instance, params
+        self.route = sol.truck_routes[truck_id]
+        self.travel = instance.travel_times(params.truck_speed)
+        self.hold = instance.hold_times
+        self.legs = instance.drone_legs(params)
+        self.delta = params.delta
+        self.delta_t = params.delta_t
+        self.M_D = params.M_D
+
+        self.labels = [(0.0, 0, NO_TRIP, NO_TRIP, NO_TRIP, NO_TRIP)]
+        self.final = self._replay(self.labels[0], 0, self.route, self.labels)
+        self.times = [label[0] for label in self.labels]
+
+        # Drone bound over the route's D customers, extended by the inserts
+        self.bound = (NO_TRIP, NO_TRIP, True)
+        for cust_id in self.route:
+            self.bound = self._extend_bound(self.bound, cust_id)
+
+    def _extend_bound(self, bound: Tuple, cust_id: int) -> Tuple:
+        """(latest ready time, longest flight, truck never behind a drone returning
+        from its meeting point) with cust_id added"""
+        leg = self.legs[cust_id]
+        if leg is None:
+            return bound
+        max_ready, max_flight, truck_first = bound
+        return (max(max_ready, self.hold[cust_id]), max(max_flight, leg[0]),
+                truck_first and leg[1] <= self.delta + self.travel[cust_id][0] + self.delta_t)
+
+    def _replay(self, label: Tuple, prev: int, nodes: List[int], record: List = None) -> float:
+        """Completion after visiting nodes from label, appending each label to record"""
+        travel, hold, legs, delta, M_D = self.travel, self.hold, self.legs, self.delta, self.M_D
+        time, slots, closed, open_r, open_a, open_f = label
+
+        for cust_id in nodes:
+            time += travel[prev][cust_id]
+            prev = cust_id
+            ready = hold[cust_id]
+            if time < ready:
+                time = ready
+
+            leg = legs[cust_id]
+            if leg is not None:
+                if slots == 0:
+                    # First D of a batch: the drone meets the truck here
+                    open_f = leg[0]
+                    open_a = time + leg[1]
+                    open_r = ready + open_f
+                    slots = M_D - 1
+                else:
+                    if ready + open_f > open_r:
+                        open_r = ready + open_f
+                    slots -= 1
+                if slots == 0:
+                    # Batch full: its return is final
+                    if open_r > closed:
+                        closed = open_r
+                    if open_a > closed:
+                        closed = open_a
+                    open_r = open_a = NO_TRIP
+
+            time += delta
+            if record is not None:
+                record.append((time, slots, closed, open_r, open_a, open_f))
+
+        if prev == 0:
+            return 0.0
+        return max(time + travel[prev][0] + self.delta_t, closed, open_r, open_a)
+
+    def completion(self, inserts: List[Tuple[int, int]] = ()) -> float:
+        """Truck or drone completion, whichever is later, with (position, customer)
+        inserts applied; positions index the current route, in increasing order"""
+        if not inserts:
+            return self.final
+        route = self.route
+        first = inserts[0][0]
+        prev = route[first - 1] if first > 0 else 0
+
+        nodes = []
+        k = first
+        for pos, cust_id in inserts:
+            nodes += route[k:pos]
+            nodes.append(cust_id)
+            k = pos
+        nodes += route[k:]
+
+        # Truck alone
+        travel, hold, delta = self.travel, self.hold, self.delta
+        time = self.times[first]
+        last = prev
+        for cust_id in nodes:
+            time += travel[last][cust_id]
+            last = cust_id
+            if time < hold[cust_id]:
+                time = hold[cust_id]
+            time += delta
+        truck = time + travel[last][0] + self.delta_t
+
+        bound = self.bound
+        for _, cust_id in inserts:
+            bound = self._extend_bound(bound, cust_id)
+        max_ready, max_flight, truck_first = bound
+        if truck_first and max_ready + max_flight <= truck:
+            finish = truck
+        else:
+            finish = self._replay(self.labels[first], prev, nodes)
+
+        if oracle.active is not None and oracle.active.sample():
+            oracle.active.check_route_completion(self.instance, self.params,
+                                                 route[:first] + nodes, finish)
+        return finish
 
-        timeline.append({
-            'customer': cust_id,
-            'arrival': arrival,
-            'departure': time
-        })
+def calculate_truck_timeline(sol: Solution, truck_id: int) -> List[Dict]:
+    """Calculate arrival and departure times - OPTIMIZED"""
+    route = sol.truck_routes[truck_id]
+    delta = sol.params.delta
+    timeline = [{'customer': cust_id, 'arrival': arrival, 'departure': arrival + delta}
+                for cust_id, arrival in zip(route, route_arrivals(sol.instance, sol.params, route))]
 
-        prev = cust_id
+    if route and oracle.active is not None and oracle.active.sample():
+        oracle.active.check_timeline(sol.instance, sol.params, route, timeline)
 
     return timeline
 
 def evaluate_solution(sol: Solution) -> float:
     """Calculate makespan - OPTIMIZED"""
     if not sol.is_feasible():
+        if oracle.active is not None and oracle.active.sample():
+            oracle.active.check_solution(sol, float('inf'))
         return float('inf')
 
     # Schedule drones once
@@ -124,51 +270,32 @@ def evaluate_solution(sol: Solution) -> float:
 
     max_time = 0.0
 
-    # Evaluate all truck routes
+    # Evaluate all truck routes (kept on the solution for the destroy operators)
+    sol.truck_times = []
     for truck_id, route in enumerate(sol.truck_routes):
-        if route:
-            truck_time = calculate_truck_time(sol, truck_id, route)
-            max_time = max(max_time, truck_time)
+        truck_time = calculate_truck_time(sol, truck_id, route)
+        sol.truck_times.append(truck_time)
+        max_time = max(max_time, truck_time)
 
     # Evaluate drone completion times
     if sol.drone_trips:
         max_drone_time = max(trip.return_time for trip in sol.drone_trips)
         max_time = max(max_time, max_drone_time)
 
+    if oracle.active is not None and oracle.active.sample():
+        oracle.active.check_solution(sol, max_time)
+
     return max_time
 
 def calculate_truck_time(sol: Solution, truck_id: int, route: List[int]) -> float:
-    """Calculate completion time - OPTIMIZED with caching"""
+    """Calculate completion time - OPTIMIZED"""
     if not route:
         return 0.0
 
-    time = 0.0
-    prev = 0
-
-    # Pre-fetch to avoid repeated attribute lookups
-    truck_speed = sol.params.truck_speed
-    delta = sol.params.delta
-    delta_t = sol.params.delta_t
-    dist_matrix = sol.instance.dist_matrix
-    customers = sol.instance.customers
-
-    for cust_id in route:
-        cust = customers[cust_id - 1]
-
-        # Travel time
-        time += dist_matrix[prev][cust_id] / truck_speed
-
-        # Wait for ready time
-        if cust.type in ['D', 'DL']:
-            time = max(time, cust.ready_time)
-
-        # Service time
-        time += delta
-        prev = cust_id
+    time = route_time(sol.instance, sol.params, route)
 
-    # Return to depot
-    time += dist_matrix[prev][0] / truck_speed
-    time += delta_t
+    if oracle.active is not None and oracle.active.sample():
+        oracle.active.check_truck_time(sol.instance, sol.params, route, time)
 
     return time
 
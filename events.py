@@ -0,0 +1,179 @@
+"""Structured solver events.
+
+The solver reports through emit(kind, level, **fields) instead of print.
+Events go to the registered sinks whose verbosity is at least the event's
+level; with no sink registered (the default) nothing is built or written,
+and hot loops guard their emits with enabled(level) so they cost one
+comparison.
+
+Levels: SUMMARY (final solution, instance loaded), PROGRESS (new best,
+restarts, relinking, stop reasons), ITERATION (periodic summaries, operator
+statistics), DEBUG (every iteration).
+
+    with events.sink(events.JsonlSink("run.jsonl")):
+        alns(instance, params)
+
+    events.add_sink(events.ConsoleSink())  # the old console output
+"""
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List
+
+SUMMARY, PROGRESS, ITERATION, DEBUG = range(4)
+
+_sinks = []
+_max_level = -1  # Highest level any sink wants (-1 = no sinks)
+
+
+def enabled(level: int) -> bool:
+    return level <= _max_level
+
+
+def emit(kind: str, level: int = PROGRESS, **fields):
+    if level > _max_level:
+        return
+    event = {'event': kind, 'level': level, 'time': time.time()}
+    event.update(fields)
+    for s in _sinks:
+        if level <= s.verbosity:
+            s.write(event)
+
+
+def _update_level():
+    global _max_level
+    _max_level = max((s.verbosity for s in _sinks), default=-1)
+
+
+def add_sink(sink):
+    _sinks.append(sink)
+    _update_level()
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+    _update_level()
+
+
+@contextmanager
+def sink(s):
+    """Register s while the block runs, then close it"""
+    add_sink(s)
+    try:
+        yield s
+    finally:
+        remove_sink(s)
+        s.close()
+
+
+@contextmanager
+def only(s):
+    """Register s as the only sink while the block runs (the others are detached), then close it"""
+    saved = list(_sinks)
+    _sinks[:] = [s]
+    _update_level()
+    try:
+        yield s
+    finally:
+        _sinks[:] = saved
+        _update_level()
+        s.close()
+
+
+def _json_default(value):
+    # NumPy scalars (float32 times, int64 ids)
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class NullSink:
+    """Accepts and drops events (for measuring the emit overhead)"""
+
+    def __init__(self, verbosity: int = DEBUG):
+        self.verbosity = verbosity
+
+    def write(self, event: Dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    """One JSON object per line, written in batches of buffer_size events"""
+
+    def __init__(self, path: str, verbosity: int = ITERATION, buffer_size: int = 256):
+        self.verbosity = verbosity
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.file = open(path, 'a')
+
+    def write(self, event: Dict):
+        self.buffer.append(json.dumps(event, default=_json_default))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.file.flush()
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class RingBufferSink:
+    """Keeps the last capacity events in memory"""
+
+    def __init__(self, capacity: int = 1000, verbosity: int = ITERATION):
+        self.verbosity = verbosity
+        self.events = deque(maxlen=capacity)
+
+    def write(self, event: Dict):
+        self.events.append(event)
+
+    def of_kind(self, kind: str) -> List[Dict]:
+        return [e for e in self.events if e['event'] == kind]
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """Human-readable lines on stdout; kinds without a format are skipped"""
+
+    FORMATS = {
+        'instance_loaded': "Loaded {n_customers} customers from {filename}\nCustomer types: {types}",
+        'alns_start': ("{source}\nInitial makespan: {makespan:.2f} hours "
+                       "(lower bound {lower_bound:.2f}, gap {gap:.1%})\n\nRunning ALNS..."),
+        'new_best': ("Iter {iteration}: New best = {makespan:.2f} hours "
+                     "(improved by {improvement:.2f}h, gap {gap:.1%})"),
+        'iteration': ("Iter {iteration}: Best = {best:.2f}, Current = {current:.2f}, "
+                      "Gap = {gap:.1%}, Temp = {temperature:.4f}, DestroyRate = {destroy_rate:.2f}, "
+                      "Time = {elapsed:.1f}s"),
+        'calibration': ("Calibrated temperature {temp_start:.4f} -> {temp_end:.4f} "
+                        "(mean worsening {mean_delta:.4f}h over {samples} samples)"),
+        'relink': "Iter {iteration}: Path relinking improved best {previous:.2f} -> {makespan:.2f} hours",
+        'recombine': "Iter {iteration}: Route recombination improved best {previous:.2f} -> {makespan:.2f} hours",
+        'restart': "Iter {iteration}: No improvement for 200 iters, restarting from {source} ({makespan:.2f} hours), reheating to {temperature:.4f}...",
+        'stop': "Iter {iteration}: Stopped ({reason})",
+        'stitched': "Stitched {windows} windows: makespan {makespan:.2f} hours",
+        'alns_end': "\nALNS completed in {elapsed:.2f} seconds\nFinal best makespan: {makespan:.2f} hours",
+    }
+
+    def __init__(self, verbosity: int = ITERATION):
+        self.verbosity = verbosity
+
+    def write(self, event: Dict):
+        fmt = self.FORMATS.get(event['event'])
+        if fmt is not None:
+            print(fmt.format(**event))
+
+    def close(self):
+        pass
@@ -0,0 +1,193 @@
+"""Exact solver for small instances.
+
+A label-setting dynamic program over (visited set, last customer) finds,
+for every customer set a single truck can serve (P-DL precedence, M_T
+capacity, route ends empty), the route with the smallest completion time:
+truck return or last drone return, whichever is later, with the drone
+resupply rule of schedule_route_drones (batches of M_D D customers in route
+order, meeting the truck at the first D of the batch). Labels carry the
+truck time, the latest closed drone return and the open drone batch, and
+dominated labels are dropped. The fleet optimum is then the best split of
+all customers into num_trucks such sets.
+
+The work grows with 2^n, so this is meant for the U_10 / U_15 families:
+as a fast path in alns() (Parameters.exact_max_customers) and as the
+reference for optimality gaps in benchmark.py.
+"""
+import math
+from typing import Dict, List, Optional, Tuple
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import evaluate_solution
+
+NO_TRIP = -math.inf
+
+
+def _dominates(a: Tuple, b: Tuple) -> bool:
+    return a[0] <= b[0] and a[1] <= b[1] and a[2] <= b[2] and a[3] <= b[3] and a[4] <= b[4]
+
+
+def route_values(instance: Instance, params: Parameters,
+                 upper_bound: float = math.inf) -> Dict[int, Tuple[float, List[int]]]:
+    """Best single-truck route per feasible customer set (bit c = customer c).
+
+    Sets whose best route is slower than upper_bound are left out.
+    """
+    n = len(instance.customers)
+    customers = instance.customers
+    travel = instance.travel_times(params.truck_speed)
+    delta, delta_t = params.delta, params.delta_t
+    load_change = instance.load_change
+
+    # Pickups that enable each DL (same pair id)
+    enablers = [0] * (n + 1)
+    for c in customers:
+        if c.type == 'DL':
+            enablers[c.id] = sum(1 << p.id for p in customers if p.type == 'P' and p.pair_id == c.pair_id)
+
+    # Drone trip met at customer c: (flight time, return time offset from the truck arrival)
+    flights = [None] * (n + 1)
+    for c in customers:
+        if c.type == 'D':
+            one_way = instance.euclidean_distance(0, c.id) / params.drone_speed
+            flight = one_way * 2 + params.delta_prime
+            flights[c.id] = (flight, one_way) if flight <= params.L_d else (NO_TRIP, NO_TRIP)
+
+    d_bits = sum(1 << c.id for c in customers if c.type == 'D')
+    full = (1 << (n + 1)) - 2
+
+    # labels[mask][last] = [(time, closed drone return, open r + flight, open arrival + travel,
+    #                        open flight, route)]
+    labels = {}
+    load = {}
+    best = {}
+
+    def push(mask, last, label):
+        # Completion can only get later from here
+        if max(label[0] + travel[last][0] + delta_t, label[1], label[2], label[3]) > upper_bound:
+            return
+        bucket = labels.setdefault(mask, {}).setdefault(last, [])
+        for other in bucket:
+            if _dominates(other, label):
+                return
+        bucket[:] = [other for other in bucket if not _dominates(label, other)]
+        bucket.append(label)
+
+    # Start labels: depot -> c
+    for c in customers:
+        if c.type == 'DL' or load_change[c.id] > params.M_T:
+            continue
+        mask = 1 << c.id
+        load[mask] = load_change[c.id]
+        label = _extend((0.0, NO_TRIP, NO_TRIP, NO_TRIP, NO_TRIP, []), 0, c, 0, travel,
+                        delta, flights, params.M_D)
+        push(mask, c.id, label)
+
+    # Extensions only add bits, so increasing mask order settles each set before its supersets
+    for mask in range(2, full + 1, 2):
+        by_last = labels.pop(mask, None)
+        if not by_last:
+            continue
+        mask_load = load[mask]
+        n_d = bin(mask & d_bits).count('1')
+
+        for last, bucket in by_last.items():
+            back = travel[last][0] + delta_t
+            for label in bucket:
+                time, closed, open_r, open_a, open_f, route = label
+                if mask_load == 0:
+                    value = max(time + back, closed, open_r, open_a)
+                    if value < best.get(mask, (math.inf,))[0]:
+                        best[mask] = (value, route)
+
+                for c in customers:
+                    bit = 1 << c.id
+                    if mask & bit:
+                        continue
+                    if c.type == 'DL' and not mask & enablers[c.id]:
+                        continue
+                    new_load = mask_load + load_change[c.id]
+                    if new_load > params.M_T or new_load < 0:
+                        continue
+                    new_mask = mask | bit
+                    load[new_mask] = new_load
+                    push(new_mask, c.id, _extend(label, last, c, n_d, travel, delta, flights,
+                                                 params.M_D))
+
+    return best
+
+
+def _extend(label: Tuple, last: int, c, n_d: int, travel, delta: float, flights,
+            M_D: int) -> Tuple:
+    """Label after driving from last to customer c (n_d D customers visited so far)"""
+    time, closed, open_r, open_a, open_f, route = label
+    time += travel[last][c.id]
+    if c.type in ('D', 'DL'):
+        time = max(time, c.ready_time)
+    arrival = time
+    time += delta
+
+    if c.type == 'D':
+        if n_d % M_D == 0:
+            # c starts a new drone batch and is its meeting point
+            flight, one_way = flights[c.id]
+            open_f = flight
+            open_a = arrival + one_way
+            open_r = c.ready_time + flight
+        else:
+            open_r = max(open_r, c.ready_time + open_f)
+
+        if (n_d + 1) % M_D == 0:
+            # Batch is full: its return time is final
+            closed = max(closed, open_r, open_a)
+            open_r = open_a = open_f = NO_TRIP
+
+    return (time, closed, open_r, open_a, open_f, route + [c.id])
+
+
+def best_split(values: Dict[int, Tuple[float, List[int]]], full: int,
+               num_trucks: int) -> Tuple[float, List[List[int]]]:
+    """Cover full with at most num_trucks disjoint route sets, minimizing the largest value"""
+    memo = {}
+
+    def solve(rest, trucks):
+        if rest == 0:
+            return 0.0, []
+        if trucks == 0:
+            return math.inf, []
+        key = (rest, trucks)
+        if key in memo:
+            return memo[key]
+
+        result = (values[rest][0], [values[rest][1]]) if rest in values else (math.inf, [])
+        if trucks > 1:
+            low = rest & -rest  # The route holding the lowest customer breaks the symmetry
+            sub = rest
+            while sub:
+                if sub & low and sub != rest and sub in values and values[sub][0] < result[0]:
+                    other, routes = solve(rest & ~sub, trucks - 1)
+                    value = max(values[sub][0], other)
+                    if value < result[0]:
+                        result = (value, [values[sub][1]] + routes)
+                sub = (sub - 1) & rest
+        memo[key] = result
+        return result
+
+    return solve(full, num_trucks)
+
+
+def solve_exact(instance: Instance, params: Parameters,
+                upper_bound: float = math.inf) -> Optional[Solution]:
+    """Optimal solution, or None if none has makespan <= upper_bound"""
+    n = len(instance.customers)
+    values = route_values(instance, params, upper_bound)
+    makespan, routes = best_split(values, (1 << (n + 1)) - 2, params.num_trucks)
+    if makespan == math.inf:
+        return None
+
+    sol = Solution(instance, params)
+    for truck_id, route in enumerate(routes):
+        sol.truck_routes[truck_id] = route
+    sol.makespan = evaluate_solution(sol)
+    return sol
@@ -8,6 +8,7 @@ import time
 from model import Instance, Parameters
 from evaluate import evaluate_solution
 from solution import Solution
+from repair import greedy_insertion
 
 
 def create_initial_solution(instance: Instance, params: Parameters) -> Solution:
@@ -47,6 +48,36 @@ def create_initial_solution(instance: Instance, params: Parameters) -> Solution:
     return sol
 
 
+def adapt_solution(sol: Solution, params: Parameters) -> Solution:
+    """Carry a solution over to other Parameters (fleet size, capacities) for a warm start"""
+    new_sol = Solution(sol.instance, params)
+    routes = [route.copy() for route in sol.truck_routes if route]
+
+    # Fewer trucks: append surplus routes to the shortest ones (each route ends empty)
+    routes.sort(key=len, reverse=True)
+    for i, route in enumerate(routes):
+        if i < params.num_trucks:
+            new_sol.truck_routes[i] = route
+        else:
+            shortest = min(new_sol.truck_routes, key=len)
+            shortest.extend(route)
+
+    # Reinsert customers of routes that break the new capacity
+    removed = []
+    for truck_id, route in enumerate(new_sol.truck_routes):
+        if not new_sol.check_truck_route(truck_id, route):
+            removed.extend(route)
+            new_sol.truck_routes[truck_id] = []
+    if removed:
+        new_sol = greedy_insertion(new_sol, removed)
+    else:
+        new_sol.makespan = evaluate_solution(new_sol)
+
+    if new_sol.makespan == float("inf"):
+        return create_initial_solution(sol.instance, params)
+    return new_sol
+
+
 def nearest_neighbor_route(customers: List[int], instance: Instance) -> List[int]:
     """Optimize route using nearest neighbor while respecting P-DL precedence"""
     if len(customers) <= 1:
@@ -69,11 +100,7 @@ def nearest_neighbor_route(customers: List[int], instance: Instance) -> List[int
             # Check precedence constraint for DL customers
             if cust.type == "DL":
                 # Find corresponding pickup
-                pickup_id = None
-                for p_id, d_id in instance.pd_pairs.items():
-                    if d_id == cust_id:
-                        pickup_id = p_id
-                        break
+                pickup_id = instance.pickup_of.get(cust_id)
 
                 # Skip DL if pickup not done yet
                 if pickup_id and pickup_id in unvisited:
@@ -4,23 +4,181 @@ import math
 import copy
 from typing import List, Dict, Tuple, Set
 import time
+import argparse
+import os
 
+import events
 from model import Parameters, Instance
 from alns import alns
+from profiling import DEFAULT_POINTS, profile_alns
+
+
+def render_solution(event: Dict, instance: Instance, params: Parameters):
+    """Print the final solution report from a 'solution' event"""
+    makespan = event['makespan']
+    truck_routes = event['truck_routes']
+    drone_trips = event['drone_trips']
+
+    print("\n" + "=" * 70)
+    print("FINAL SOLUTION")
+    print("=" * 70)
+    print(f"Makespan: {makespan:.2f} hours ({makespan*60:.1f} minutes)")
+    print(f"Computation time: {event['elapsed']:.2f} seconds")
+
+    # Truck routes
+    print("\n" + "-" * 70)
+    print("TRUCK ROUTES:")
+    print("-" * 70)
+    for i, route in enumerate(truck_routes):
+        if route:
+            route_str = " -> ".join([str(0)] + [str(c) for c in route] + [str(0)])
+            print(f"  Truck {i}: {route_str}")
+            print(f"           ({len(route)} customers)")
+        else:
+            print(f"  Truck {i}: Empty")
+
+    # Drone trips
+    print("\n" + "-" * 70)
+    print("DRONE TRIPS:")
+    print("-" * 70)
+    if drone_trips:
+        for i, trip in enumerate(drone_trips):
+            items_str = ", ".join([str(c) for c in trip['items']])
+            print(f"  Drone trip {i+1}:")
+            print(f"    Items to resupply: [{items_str}]")
+            print(f"    Meet truck {trip['meet_truck']} at customer {trip['meet_node']}")
+            print(f"    Depart depot: {trip['depart_time']:.2f}h ({trip['depart_time']*60:.1f} min)")
+            print(f"    Return depot: {trip['return_time']:.2f}h ({trip['return_time']*60:.1f} min)")
+            print(f"    Flight time: {trip['flight_time']:.2f}h ({trip['flight_time']*60:.1f} min)")
+
+            # Show customers being resupplied
+            for cust_id in trip['items']:
+                cust = instance.customers[cust_id - 1]
+                print(f"      - Customer {cust_id} (type {cust.type}, ready={cust.ready_time:.2f}h)")
+    else:
+        print("  No drone trips scheduled (all deliveries handled by trucks)")
+
+    # Show customer details in routes
+    print("\n" + "-" * 70)
+    print("DETAILED ROUTE INFORMATION:")
+    print("-" * 70)
+    for truck_id, route in enumerate(truck_routes):
+        if not route:
+            continue
+        print(f"\n  Truck {truck_id}:")
+        travel_times = instance.travel_times(params.truck_speed)
+        current_time = 0
+        load = 0
+        prev = 0
+
+        for cust_id in route:
+            cust = instance.customers[cust_id - 1]
+
+            # Travel time
+            travel = travel_times[prev][cust_id]
+            current_time += travel
+
+            # Wait for ready time
+            wait = 0
+            if cust.type in ["D", "DL"]:
+                if current_time < cust.ready_time:
+                    wait = cust.ready_time - current_time
+                    current_time = cust.ready_time
+
+            arrival_time = current_time
+
+            # Update load
+            if cust.type == "P":
+                load += cust.weight
+                action = "PICKUP"
+            elif cust.type == "DL":
+                load -= cust.weight
+                action = "DELIVERY (from pickup)"
+            else:  # 'D'
+                action = "DELIVERY (resupplied by drone)"
+
+            # Service
+            current_time += params.delta
+
+            # Check if drone meets here
+            drone_meet = ""
+            for trip_idx, trip in enumerate(drone_trips):
+                if trip['meet_truck'] == truck_id and trip['meet_node'] == cust_id:
+                    drone_meet = f" [DRONE MEET #{trip_idx+1}]"
+                    break
 
+            print(
+                f"    -> Customer {cust_id:2d} ({cust.type:2s}): "
+                f"arrive={arrival_time:5.2f}h, {action:30s}, "
+                f"load={load:2d}{drone_meet}"
+            )
 
-def main():
-    import os
-    import glob
+            if wait > 0.01:
+                print(f"       (waited {wait:.2f}h for ready time)")
+
+            prev = cust_id
+
+        # Return to depot
+        travel = travel_times[prev][0]
+        current_time += travel
+        print(f"    -> Depot: arrive={current_time:.2f}h (completion time)")
+
+    # Summary statistics
+    print("\n" + "-" * 70)
+    print("SUMMARY:")
+    print("-" * 70)
+    total_customers = sum(len(r) for r in truck_routes)
+    delivery_d = len([c for c in instance.customers if c.type == "D"])
+    pickup_p = len([c for c in instance.customers if c.type == "P"])
+    delivery_dl = len([c for c in instance.customers if c.type == "DL"])
+
+    print(f"  Total customers served: {total_customers}")
+    print(f"  - Type D (delivery from depot): {delivery_d}")
+    print(f"  - Type P (pickup): {pickup_p}")
+    print(f"  - Type DL (delivery from pickup): {delivery_dl}")
+    print(f"  Number of trucks used: {sum(1 for r in truck_routes if r)}")
+    print(f"  Number of drone trips: {len(drone_trips)}")
+    print(f"  Makespan: {makespan:.2f}h = {makespan*60:.1f} minutes")
+
+
+class ReportSink:
+    """Renders the report when the final solution event arrives"""
+
+    def __init__(self, instance: Instance, params: Parameters):
+        self.verbosity = events.SUMMARY
+        self.instance = instance
+        self.params = params
+
+    def write(self, event: Dict):
+        if event['event'] == 'solution':
+            render_solution(event, self.instance, self.params)
+
+    def close(self):
+        pass
 
-    # Specify the instance file or folder
-    instance_path = "data/Instance/U_100_0.5_Num_1_pd.txt"
-    selected_files = [instance_path]
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve instances with ALNS")
+    parser.add_argument('instances', nargs='*', default=["data/Instance/U_100_0.5_Num_1_pd.txt"])
+    parser.add_argument('--verbosity', type=int, default=events.ITERATION,
+                        help="Console detail: 0 summary, 1 progress, 2 iterations, 3 debug")
+    parser.add_argument('--log', help="Also append events to this JSONL file")
+    parser.add_argument('--log-verbosity', type=int, default=events.ITERATION)
+    parser.add_argument('--seed', type=int, help="Seed the search (default: unseeded)")
+    parser.add_argument('--profile', metavar='DIR',
+                        help="Profile each run; write pstats, collapsed stacks and memory snapshots to DIR")
+    parser.add_argument('--profile-points', default=",".join(DEFAULT_POINTS),
+                        help="Comma-separated events at which to snapshot memory (empty: no tracemalloc)")
+    args = parser.parse_args()
 
     # Run ALNS on selected instances
     params = Parameters()
+    params.seed = args.seed
+
+    events.add_sink(events.ConsoleSink(args.verbosity))
+    log = events.add_sink(events.JsonlSink(args.log, args.log_verbosity)) if args.log else None
 
-    for instance_file in selected_files:
+    for instance_file in args.instances:
         print("\n" + "=" * 70)
         print(f"SOLVING INSTANCE: {os.path.basename(instance_file)}")
         print("=" * 70)
@@ -30,148 +188,16 @@ def main():
             instance = Instance(instance_file)
             print(f"Depot at ({instance.depot.x}, {instance.depot.y})")
 
-            # Run ALNS
-            start_time = time.time()
-            solution = alns(instance, params)
-            elapsed = time.time() - start_time
-
-            print("\n" + "=" * 70)
-            print("FINAL SOLUTION")
-            print("=" * 70)
-            print(
-                f"Makespan: {solution.makespan:.2f} hours ({solution.makespan*60:.1f} minutes)"
-            )
-            print(f"Computation time: {elapsed:.2f} seconds")
-
-            # Truck routes
-            print("\n" + "-" * 70)
-            print("TRUCK ROUTES:")
-            print("-" * 70)
-            for i, route in enumerate(solution.truck_routes):
-                if route:
-                    route_str = " -> ".join(
-                        [str(0)] + [str(c) for c in route] + [str(0)]
-                    )
-                    print(f"  Truck {i}: {route_str}")
-                    print(f"           ({len(route)} customers)")
+            # Run ALNS; the report is rendered from its final solution event
+            with events.sink(ReportSink(instance, params)):
+                if args.profile:
+                    points = [p for p in args.profile_points.split(",") if p]
+                    _, phases = profile_alns(instance, params, args.profile, points)
+                    print("\nPHASES (cumulative CPU seconds, phases nest):")
+                    for name, (calls, seconds) in phases.items():
+                        print(f"  {name:18s} {seconds:8.2f}s  {calls:8d} calls")
                 else:
-                    print(f"  Truck {i}: Empty")
-
-            # Drone trips
-            print("\n" + "-" * 70)
-            print("DRONE TRIPS:")
-            print("-" * 70)
-            if solution.drone_trips:
-                for i, trip in enumerate(solution.drone_trips):
-                    items_str = ", ".join([str(c) for c in trip.items])
-                    print(f"  Drone trip {i+1}:")
-                    print(f"    Items to resupply: [{items_str}]")
-                    print(
-                        f"    Meet truck {trip.meet_truck} at customer {trip.meet_node}"
-                    )
-                    print(
-                        f"    Depart depot: {trip.depart_time:.2f}h ({trip.depart_time*60:.1f} min)"
-                    )
-                    print(
-                        f"    Return depot: {trip.return_time:.2f}h ({trip.return_time*60:.1f} min)"
-                    )
-                    print(
-                        f"    Flight time: {trip.flight_time:.2f}h ({trip.flight_time*60:.1f} min)"
-                    )
-
-                    # Show customers being resupplied
-                    for cust_id in trip.items:
-                        cust = instance.customers[cust_id - 1]
-                        print(
-                            f"      - Customer {cust_id} (type {cust.type}, ready={cust.ready_time:.2f}h)"
-                        )
-            else:
-                print("  No drone trips scheduled (all deliveries handled by trucks)")
-
-            # Show customer details in routes
-            print("\n" + "-" * 70)
-            print("DETAILED ROUTE INFORMATION:")
-            print("-" * 70)
-            for truck_id, route in enumerate(solution.truck_routes):
-                if not route:
-                    continue
-                print(f"\n  Truck {truck_id}:")
-                current_time = 0
-                load = 0
-                prev = 0
-
-                for cust_id in route:
-                    cust = instance.customers[cust_id - 1]
-
-                    # Travel time
-                    travel = instance.dist_matrix[prev][cust_id] / params.truck_speed
-                    current_time += travel
-
-                    # Wait for ready time
-                    wait = 0
-                    if cust.type in ["D", "DL"]:
-                        if current_time < cust.ready_time:
-                            wait = cust.ready_time - current_time
-                            current_time = cust.ready_time
-
-                    arrival_time = current_time
-
-                    # Update load
-                    if cust.type == "P":
-                        load += cust.weight
-                        action = "PICKUP"
-                    elif cust.type == "DL":
-                        load -= cust.weight
-                        action = "DELIVERY (from pickup)"
-                    else:  # 'D'
-                        action = "DELIVERY (resupplied by drone)"
-
-                    # Service
-                    current_time += params.delta
-
-                    # Check if drone meets here
-                    drone_meet = ""
-                    for trip_idx, trip in enumerate(solution.drone_trips):
-                        if trip.meet_truck == truck_id and trip.meet_node == cust_id:
-                            drone_meet = f" [DRONE MEET #{trip_idx+1}]"
-                            break
-
-                    print(
-                        f"    -> Customer {cust_id:2d} ({cust.type:2s}): "
-                        f"arrive={arrival_time:5.2f}h, {action:30s}, "
-                        f"load={load:2d}{drone_meet}"
-                    )
-
-                    if wait > 0.01:
-                        print(f"       (waited {wait:.2f}h for ready time)")
-
-                    prev = cust_id
-
-                # Return to depot
-                travel = instance.dist_matrix[prev][0] / params.truck_speed
-                current_time += travel
-                print(f"    -> Depot: arrive={current_time:.2f}h (completion time)")
-
-            # Summary statistics
-            print("\n" + "-" * 70)
-            print("SUMMARY:")
-            print("-" * 70)
-            total_customers = sum(len(r) for r in solution.truck_routes)
-            delivery_d = len([c for c in instance.customers if c.type == "D"])
-            pickup_p = len([c for c in instance.customers if c.type == "P"])
-            delivery_dl = len([c for c in instance.customers if c.type == "DL"])
-
-            print(f"  Total customers served: {total_customers}")
-            print(f"  - Type D (delivery from depot): {delivery_d}")
-            print(f"  - Type P (pickup): {pickup_p}")
-            print(f"  - Type DL (delivery from pickup): {delivery_dl}")
-            print(
-                f"  Number of trucks used: {sum(1 for r in solution.truck_routes if r)}"
-            )
-            print(f"  Number of drone trips: {len(solution.drone_trips)}")
-            print(
-                f"  Makespan: {solution.makespan:.2f}h = {solution.makespan*60:.1f} minutes"
-            )
+                    alns(instance, params)
 
         except Exception as e:
             print(f"Error processing {instance_file}: {e}")
@@ -179,6 +205,9 @@ def main():
 
             traceback.print_exc()
 
+    if log is not None:
+        log.close()
+
 
 if __name__ == "__main__":
     main()
@@ -4,6 +4,10 @@ import math
 import copy
 from typing import List, Dict, Tuple, Set
 import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import events
 
 class Parameters:
     def __init__(self):
@@ -27,11 +31,95 @@ class Parameters:
         # ALNS parameters - OPTIMIZED for 100 customers
         self.max_iterations = 2000  # Increased for larger instances
         self.destroy_rate = 0.25  # Start with 25%
-        self.temp_start = 100
-        self.cooling_rate = 0.9975  # Slower cooling for more iterations
-        self.weights = {'destroy': [1.0] * 3, 'repair': [1.0] * 2}
+        self.weights = {'destroy': [1.0] * 5, 'repair': [1.0] * 3}
         self.scores = [15, 8, 2]  # Increased rewards for better solutions
 
+        # Simulated annealing (annealing.py): temperatures left at None are calibrated from
+        # calibration_samples destroy/repair deltas so that the mean worsening is accepted
+        # with start_acceptance at the start and end_acceptance at the end of the budget.
+        # cooling_rate None cools to temp_end exactly over the iteration or time budget,
+        # a number cools geometrically per iteration. Restarts reheat to accept the recent
+        # worsenings with reheat_acceptance
+        self.temp_start = None
+        self.temp_end = None
+        self.cooling_rate = None
+        self.calibration_samples = 20
+        self.start_acceptance = 0.5
+        self.end_acceptance = 0.01
+        self.reheat_acceptance = 0.2
+
+        # Operator selection: 'classic' (score per call) or 'time' (score per CPU second)
+        self.operator_selection = 'classic'
+        self.segment_length = 100
+        self.reaction_factor = 0.2
+        self.min_weight_ratio = 0.05  # Weight floor relative to the best operator
+
+        # String removal and blink insertion (SISR)
+        self.max_string_length = 10
+        self.split_rate = 0.5  # Chance that a removed string keeps a run of customers in place
+        self.split_depth = 0.01  # Chance per customer to stop growing the kept run
+        self.blink_rate = 0.01  # Chance to skip each insertion position
+
+        # Elite pool and path relinking (elite_size = 0 disables them)
+        self.elite_size = 5
+        self.elite_min_distance = 0.05  # Edge distance below which solutions count as the same
+        self.relink_interval = 250
+        self.relink_candidates = 8  # Units tried per relinking step
+
+        # Route pool and set-covering recombination (recombine_interval = 0 disables them)
+        self.route_pool_size = 2000
+        self.recombine_interval = 200
+        self.recombine_nodes = 20000  # Branch-and-bound node limit per recombination
+
+        # Tiny instances: after exact_after iterations, finish with the exact solver
+        # (exact_max_customers = 0 disables it)
+        self.exact_max_customers = 15
+        self.exact_after = 100
+
+        # Speculative candidates per iteration (parallel.py; batch_size = 1 is the plain loop).
+        # batch_acceptance: 'sequential' runs the SA test on each candidate in turn,
+        # 'best' only on the best candidate of the batch
+        self.batch_size = 1
+        self.batch_workers = 1
+        self.batch_acceptance = 'sequential'
+
+        # Stop once the best is within this relative gap of the makespan lower bound (bounds.py)
+        self.target_gap = 0.01
+
+        # Stop after this many seconds of search (None = iteration budget only)
+        self.time_limit = None
+
+        # Seed for the random module at the start of alns() (None = unseeded)
+        self.seed = None
+
+    @classmethod
+    def load(cls, path: str, n_customers: int = None) -> "Parameters":
+        """Parameters from a tuned config file ({size: {name: value}}, see tune.py).
+
+        Uses the entry for the closest instance size, or the defaults if the
+        file has no entries.
+        """
+        import json
+
+        with open(path) as f:
+            config = json.load(f)
+
+        params = cls()
+        sizes = [int(size) for size in config]
+        if sizes:
+            target = n_customers if n_customers is not None else max(sizes)
+            size = min(sizes, key=lambda s: (abs(s - target), s))
+            params.update(config[str(size)].get('params', {}))
+        return params
+
+    def update(self, overrides: Dict) -> "Parameters":
+        """Apply {name: value} overrides, rejecting unknown parameter names"""
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown parameter: {name}")
+            setattr(self, name, copy.deepcopy(value))
+        return self
+
 class Customer:
     __slots__ = ['id', 'x', 'y', 'type', 'ready_time', 'pair_id', 'weight']
     
@@ -44,21 +132,137 @@ class Customer:
         self.pair_id = pair_id
         self.weight = 1
 
+# Customer type codes used in the shared arrays
+TYPE_CODES = {'DEPOT': 0, 'D': 1, 'P': 2, 'DL': 3}
+TYPE_NAMES = ['DEPOT', 'D', 'P', 'DL']
+
+
+class SharedInstanceHandle:
+    """Small picklable reference to instance arrays published by Instance.publish"""
+    __slots__ = ['backend', 'name', 'size', 'layout', 'filename']
+
+    def __init__(self, backend, name, size, layout, filename):
+        self.backend = backend  # 'shm' or 'mmap'
+        self.name = name  # Shared memory block name or file path
+        self.size = size
+        self.layout = layout  # {field: (offset, shape, dtype)}
+        self.filename = filename
+
+    def __getstate__(self):
+        return (self.backend, self.name, self.size, self.layout, self.filename)
+
+    def __setstate__(self, state):
+        self.backend, self.name, self.size, self.layout, self.filename = state
+
+
+# Instances attached or published in this process, by handle name, least recently used first
+_attached_instances = OrderedDict()
+MAX_ATTACHED_INSTANCES = 4  # Attachments kept per process; published instances are not counted
+
+
+def attach_instance(handle: SharedInstanceHandle) -> "Instance":
+    """Attach to published instance data, reusing an earlier attachment.
+
+    Long-running workers see many instances come and go, so beyond
+    MAX_ATTACHED_INSTANCES the least recently used attachment is released.
+    """
+    instance = _attached_instances.get(handle.name)
+    if instance is None:
+        instance = Instance.attach(handle)
+        _attached_instances[handle.name] = instance
+        attached = [inst for inst in _attached_instances.values() if not inst._owner]
+        for old in attached[:max(0, len(attached) - MAX_ATTACHED_INSTANCES)]:
+            old.release()
+    else:
+        _attached_instances.move_to_end(handle.name)
+    return instance
+
+
 class Instance:
-    def __init__(self, filename):
+    def __init__(self, filename, text=None):
+        self.filename = filename
         self.customers = []
         self.depot = Customer(0, 10, 10, 'DEPOT', 0, 0)
-        self.load_instance(filename)
+        self.load_instance(filename, text)
         self.dist_matrix = self.compute_distances()
+        self.euclid_matrix = None  # Set when attached to published data
         self.euclidean_dist_cache = {}  # Cache for euclidean distances
+        self._shared = None  # Published block this instance owns or is attached to
+        self._handle = None
+        self._owner = False
+        self.build_derived()
+
+    def build_derived(self):
+        """Lookup structures derived from the customer list"""
         self.n_customers = len(self.customers)
         self.pd_pairs = self.build_pd_pairs()
+        self.pickup_of = {dl_id: p_id for p_id, dl_id in self.pd_pairs.items()}  # DL -> P
+        self.load_change, self.pair_mask = self.build_route_codes()
+
+        # Timing kernel inputs (see evaluate.route_time): the ready time a truck
+        # waits for at each node (0 where it never waits) and travel times per speed
+        self.hold_times = [0.0] * (len(self.customers) + 1)
+        for c in self.customers:
+            if c.type in ('D', 'DL'):
+                self.hold_times[c.id] = float(c.ready_time)
+        self._travel_times = {}
+        self._drone_legs = {}
+
+    def drone_legs(self, params) -> List:
+        """Per node (flight time, one-way time) of a drone trip met there; None for
+        non-D nodes, (-inf, -inf) where the flight exceeds L_d and is dropped"""
+        key = (params.drone_speed, params.delta_prime, params.L_d)
+        legs = self._drone_legs.get(key)
+        if legs is None:
+            legs = [None] * (len(self.customers) + 1)
+            for c in self.customers:
+                if c.type == 'D':
+                    one_way = self.euclidean_distance(0, c.id) / params.drone_speed
+                    flight = one_way * 2 + params.delta_prime
+                    legs[c.id] = (flight, one_way) if flight <= params.L_d else (-math.inf, -math.inf)
+            self._drone_legs[key] = legs
+        return legs
+
+    def travel_times(self, speed: float) -> List[List[float]]:
+        """Truck travel time matrix in hours, as float64 nested lists for fast scalar indexing"""
+        times = self._travel_times.get(speed)
+        if times is None:
+            times = (self.dist_matrix.astype(np.float64) / speed).tolist()
+            self._travel_times[speed] = times
+        return times
+
+    def add_customers(self, rows) -> List[int]:
+        """Append customers given as (x, y, type, ready_time in minutes, pair_id)
+        rows; returns their new ids. Published instances are read-only."""
+        if self._shared is not None:
+            raise ValueError("Cannot add customers to a published instance")
+
+        new_ids = []
+        for x, y, type, ready, pair in rows:
+            cust_id = len(self.customers) + 1
+            self.customers.append(Customer(cust_id, float(x), float(y), type, float(ready), int(pair)))
+            new_ids.append(cust_id)
+
+        self.dist_matrix = self.compute_distances()
+        self.build_derived()
+        return new_ids
+
+    def subset(self, cust_ids: List[int]) -> "Instance":
+        """Instance with only the given customers, renumbered 1..k in that order"""
+        lines = []
+        for new_id, cust_id in enumerate(cust_ids, 1):
+            c = self.customers[cust_id - 1]
+            lines.append(f"{new_id} {c.x} {c.y} {c.type} {c.ready_time * 60} {c.pair_id}")
+        return Instance(self.filename, text="\n".join(lines))
+
+    def load_instance(self, filename, text=None):
+        """Load instance from a file (or from its text content) - OPTIMIZED"""
+        if text is None:
+            with open(filename, 'r') as f:
+                lines = f.readlines()
+        else:
+            lines = text.splitlines()
 
-    def load_instance(self, filename):
-        """Load instance - OPTIMIZED"""
-        with open(filename, 'r') as f:
-            lines = f.readlines()
-        
         for line in lines:
             line = line.strip()
             if line.startswith('#') or not line:
@@ -77,13 +281,12 @@ class Instance:
                 except ValueError:
                     continue
 
-        print(f"Loaded {len(self.customers)} customers from {filename}")
-
-        # Print customer distribution
-        types = {}
-        for c in self.customers:
-            types[c.type] = types.get(c.type, 0) + 1
-        print(f"Customer types: {types}")
+        if events.enabled(events.PROGRESS):
+            types = {}
+            for c in self.customers:
+                types[c.type] = types.get(c.type, 0) + 1
+            events.emit('instance_loaded', events.PROGRESS, filename=filename,
+                        n_customers=len(self.customers), types=types)
 
     def build_pd_pairs(self):
         """Build P-DL pairs mapping - OPTIMIZED"""
@@ -96,6 +299,21 @@ class Instance:
         
         return pairs
 
+    def build_route_codes(self):
+        """Per-node load change and pickup bit (index 0 is the depot)"""
+        load_change = [0] * (len(self.customers) + 1)
+        pair_mask = [0] * (len(self.customers) + 1)
+
+        for c in self.customers:
+            if c.type == 'P':
+                load_change[c.id] = c.weight
+                pair_mask[c.id] = 1 << c.pair_id
+            elif c.type == 'DL':
+                load_change[c.id] = -c.weight
+                pair_mask[c.id] = 1 << c.pair_id
+
+        return load_change, pair_mask
+
     def compute_distances(self):
         """Compute Manhattan distance matrix - OPTIMIZED"""
         n = len(self.customers) + 1
@@ -113,6 +331,9 @@ class Instance:
 
     def euclidean_distance(self, i: int, j: int) -> float:
         """Euclidean distance with caching"""
+        if self.euclid_matrix is not None:
+            return float(self.euclid_matrix[i, j])
+
         if i > j:
             i, j = j, i
         
@@ -126,4 +347,128 @@ class Instance:
         dist = math.sqrt(dx * dx + dy * dy)
         
         self.euclidean_dist_cache[key] = dist
-        return dist
\ No newline at end of file
+        return dist
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Instance data as flat NumPy arrays indexed by node id (0 is the depot)"""
+        nodes = [self.depot] + self.customers
+        coords = np.array([[c.x, c.y] for c in nodes], dtype=np.float64)
+
+        partner = np.zeros(len(nodes), dtype=np.int32)
+        for p_id, dl_id in self.pd_pairs.items():
+            partner[p_id] = dl_id
+            partner[dl_id] = p_id
+
+        diff = coords[:, None, :] - coords[None, :, :]
+        return {
+            'coords': coords,
+            'ready_time': np.array([c.ready_time for c in nodes], dtype=np.float64),
+            'type_code': np.array([TYPE_CODES[c.type] for c in nodes], dtype=np.int8),
+            'pair_id': np.array([c.pair_id for c in nodes], dtype=np.int32),
+            'partner': partner,
+            'dist_matrix': np.ascontiguousarray(self.dist_matrix),
+            'euclid_matrix': np.sqrt(diff[:, :, 0] ** 2 + diff[:, :, 1] ** 2),
+        }
+
+    def publish(self, backend: str = 'shm', path: str = None) -> SharedInstanceHandle:
+        """Copy the instance arrays into shared memory (or a memory-mapped file).
+
+        Workers call attach_instance(handle) to map the same block without
+        copying it. Once published, pickling the instance only sends the
+        handle. The publisher owns the block and frees it with release().
+        """
+        if self._handle is not None:
+            return self._handle
+
+        arrays = self.to_arrays()
+        layout = {}
+        size = 0
+        for field, arr in arrays.items():
+            size = (size + 7) // 8 * 8  # Keep every array 8-byte aligned
+            layout[field] = (size, arr.shape, arr.dtype.str)
+            size += arr.nbytes
+
+        if backend == 'shm':
+            self._shared = shared_memory.SharedMemory(create=True, size=size)
+            buf = self._shared.buf
+            name = self._shared.name
+        elif backend == 'mmap':
+            if path is None:
+                raise ValueError("mmap backend needs a file path")
+            self._shared = np.memmap(path, dtype=np.uint8, mode='w+', shape=(size,))
+            buf = self._shared
+            name = path
+        else:
+            raise ValueError(f"Unknown shared instance backend: {backend}")
+
+        for field, arr in arrays.items():
+            offset, shape, dtype = layout[field]
+            np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)[...] = arr
+        if backend == 'mmap':
+            self._shared.flush()
+
+        self._handle = SharedInstanceHandle(backend, name, size, layout, self.filename)
+        self._owner = True
+        _attached_instances[name] = self
+        return self._handle
+
+    @classmethod
+    def attach(cls, handle: SharedInstanceHandle) -> "Instance":
+        """Build a read-only instance on top of published arrays"""
+        if handle.backend == 'shm':
+            shared = shared_memory.SharedMemory(name=handle.name)
+            buf = shared.buf
+        else:
+            shared = np.memmap(handle.name, dtype=np.uint8, mode='r', shape=(handle.size,))
+            buf = shared
+
+        arrays = {}
+        for field, (offset, shape, dtype) in handle.layout.items():
+            arr = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            arr.flags.writeable = False
+            arrays[field] = arr
+
+        inst = cls.__new__(cls)
+        inst.filename = handle.filename
+        inst._shared = shared
+        inst._handle = handle
+        inst._owner = False
+
+        coords = arrays['coords']
+        inst.depot = Customer(0, float(coords[0, 0]), float(coords[0, 1]), 'DEPOT', 0, 0)
+        inst.customers = []
+        for i in range(1, len(coords)):
+            cust = Customer(i, float(coords[i, 0]), float(coords[i, 1]),
+                            TYPE_NAMES[arrays['type_code'][i]], 0, int(arrays['pair_id'][i]))
+            cust.ready_time = float(arrays['ready_time'][i])
+            inst.customers.append(cust)
+
+        inst.dist_matrix = arrays['dist_matrix']
+        inst.euclid_matrix = arrays['euclid_matrix']
+        inst.euclidean_dist_cache = {}
+        inst.build_derived()
+        return inst
+
+    def release(self):
+        """Detach from published data, freeing it if this process published it"""
+        if self._shared is None:
+            return
+
+        _attached_instances.pop(self._handle.name, None)
+        if isinstance(self._shared, shared_memory.SharedMemory):
+            if not self._owner:
+                # Views into the block must go before it can be closed
+                self.dist_matrix = np.array(self.dist_matrix)
+                self.euclid_matrix = np.array(self.euclid_matrix)
+            self._shared.close()
+            if self._owner:
+                self._shared.unlink()
+        self._shared = None
+        self._handle = None
+        self._owner = False
+
+    def __reduce_ex__(self, protocol):
+        # Published instances travel as their handle
+        if self._handle is not None:
+            return (attach_instance, (self._handle,))
+        return super().__reduce_ex__(protocol)
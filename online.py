@@ -0,0 +1,125 @@
+"""Online re-optimization for orders that arrive during the day.
+
+OnlinePlanner keeps a live Solution. On each order event it freezes what
+the trucks have already executed by the current clock, inserts the new
+customers (D customers or P-DL pairs) with the repair operators and runs a
+short alns() warm-started from the current plan, bounded by a latency
+target. Nothing is re-solved from scratch.
+
+The command line simulates a day: D customers become known lead minutes
+before their ready time and are streamed to the planner in release order.
+
+    python online.py data/Instance/U_50_1.0_Num_1_pd.txt --lead 60 --latency 1.0
+"""
+import argparse
+import copy
+import time
+from typing import Dict, List, Tuple
+
+from model import Instance, Parameters
+from solution import Solution
+from initial_solution import create_initial_solution
+from evaluate import calculate_truck_timeline
+from repair import greedy_insertion
+from alns import alns
+
+
+class OnlinePlanner:
+    def __init__(self, instance: Instance, params: Parameters, latency: float = 1.0):
+        self.instance = instance
+        self.params = params
+        self.latency = latency  # Seconds per event, insertion included
+        self.clock = 0.0  # Hours
+        self.solution = create_initial_solution(instance, params)
+        self.events = []  # Per event: clock, new customers, makespan, seconds
+
+    def advance(self, clock: float):
+        """Freeze every customer a truck has reached or is driving to at clock"""
+        self.clock = max(self.clock, clock)
+        sol = self.solution
+        for truck_id in range(len(sol.truck_routes)):
+            # A truck is committed to a customer once it left the previous stop
+            leave = 0.0
+            committed = 0
+            for entry in calculate_truck_timeline(sol, truck_id):
+                if leave >= self.clock:
+                    break
+                committed += 1
+                leave = entry['departure']
+            sol.frozen[truck_id] = max(sol.frozen[truck_id], committed)
+
+    def on_orders(self, clock: float, rows: List[Tuple]) -> Solution:
+        """Re-plan for new orders given as (x, y, type, ready_time in minutes, pair_id)"""
+        start = time.perf_counter()
+        self.advance(clock)
+
+        new_ids = self.instance.add_customers(rows)
+        current = greedy_insertion(self.solution, new_ids)
+
+        budget = self.latency - (time.perf_counter() - start)
+        if budget > 0:
+            params = copy.copy(self.params)
+            params.time_limit = budget
+            params.max_iterations = 10 ** 9  # The latency target is the limit
+            current = alns(self.instance, params, initial=current)
+
+        self.solution = current
+        seconds = time.perf_counter() - start
+        self.events.append({'clock': self.clock, 'customers': new_ids,
+                            'makespan': float(current.makespan), 'seconds': seconds})
+        return current
+
+
+def split_instance(path: str, lead: float) -> Tuple[Instance, Dict[float, List[Tuple]]]:
+    """Initially known instance and the held-back D customers by release time (hours)"""
+    with open(path) as f:
+        rows = [line.split() for line in f if line.strip() and not line.startswith('#')]
+
+    known = []
+    releases = {}
+    for parts in rows:
+        x, y, type, ready, pair = float(parts[1]), float(parts[2]), parts[3], float(parts[4]), int(parts[5])
+        release = max(0.0, ready - lead) / 60
+        if type == 'D' and release > 0:
+            releases.setdefault(release, []).append((x, y, type, ready, pair))
+        else:
+            known.append((x, y, type, ready, pair))
+
+    text = "\n".join(f"{i} {x} {y} {type} {ready} {pair}"
+                     for i, (x, y, type, ready, pair) in enumerate(known, 1))
+    return Instance(path, text=text), releases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate streaming order arrivals")
+    parser.add_argument('instance')
+    parser.add_argument('--lead', type=float, default=60.0,
+                        help="Minutes between an order becoming known and its ready time")
+    parser.add_argument('--latency', type=float, default=1.0, help="Re-planning target in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    params = Parameters()
+    params.seed = args.seed
+
+    instance, releases = split_instance(args.instance, args.lead)
+    planner = OnlinePlanner(instance, params, args.latency)
+    print(f"Initial plan for {len(instance.customers)} known customers: "
+          f"makespan {planner.solution.makespan:.3f}h")
+
+    for clock in sorted(releases):
+        sol = planner.on_orders(clock, releases[clock])
+        event = planner.events[-1]
+        print(f"  t={clock:6.2f}h: +{len(event['customers'])} orders, "
+              f"{sum(sol.frozen)} stops frozen, makespan {event['makespan']:.3f}h "
+              f"({event['seconds']:.2f}s)")
+
+    seconds = [e['seconds'] for e in planner.events]
+    if seconds:
+        print(f"{len(seconds)} events, re-planning latency mean {sum(seconds) / len(seconds):.2f}s "
+              f"max {max(seconds):.2f}s (target {args.latency:.2f}s)")
+    print(f"Final makespan: {planner.solution.makespan:.3f}h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Differential correctness oracle for the fast evaluation paths.
+
+The reference_* functions are frozen copies of the original, straightforward
+route checks and timing code. When an oracle is active, the fast paths
+(check_truck_route, RouteState insertion checks, calculate_truck_time,
+calculate_truck_timeline, RoutePlan insertion costs, evaluate_solution) hand a sample of their results
+to it, and it recomputes them with the reference code and records any
+mismatch together with the route that caused it.
+
+    with oracle.shadow(sample_rate=0.2) as o:
+        alns(instance, params)
+    o.report()
+
+Setting ALNS_SHADOW=<rate> in the environment enables it for a whole run.
+Sampling uses its own random generator, so the search trajectory of a
+seeded run does not change.
+"""
+import math
+import os
+import random
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Oracle consulted by the fast paths (None = disabled)
+active = None
+
+
+class OracleMismatch(AssertionError):
+    pass
+
+
+def reference_check_truck_route(instance, M_T: int, route: List[int]) -> bool:
+    """Route feasibility: P-DL precedence, capacity M_T, empty at the end"""
+    load = 0
+    pickup_served = set()
+    for cust_id in route:
+        cust = instance.customers[cust_id - 1]
+        if cust.type == "P":
+            pickup_served.add(cust.pair_id)
+            load += cust.weight
+        elif cust.type == "DL":
+            if cust.pair_id not in pickup_served:
+                return False
+            load -= cust.weight
+        if load > M_T or load < 0:
+            return False
+    return load == 0
+
+
+def reference_truck_timeline(instance, params, route: List[int]) -> List[Dict]:
+    timeline = []
+    time = 0.0
+    prev = 0
+    for cust_id in route:
+        cust = instance.customers[cust_id - 1]
+        time += float(instance.dist_matrix[prev][cust_id]) / params.truck_speed
+        if cust.type in ['D', 'DL']:
+            time = max(time, cust.ready_time)
+        arrival = time
+        time += params.delta
+        timeline.append({'customer': cust_id, 'arrival': arrival, 'departure': time})
+        prev = cust_id
+    return timeline
+
+
+def reference_truck_time(instance, params, route: List[int]) -> float:
+    if not route:
+        return 0.0
+    timeline = reference_truck_timeline(instance, params, route)
+    time = timeline[-1]['departure']
+    time += float(instance.dist_matrix[route[-1]][0]) / params.truck_speed
+    return time + params.delta_t
+
+
+def reference_drone_returns(instance, params, routes: List[List[int]]) -> List[float]:
+    """Return times of the drone trips schedule_drones builds for these routes"""
+    returns = []
+    for route in routes:
+        timeline = reference_truck_timeline(instance, params, route)
+        deliveries = [(c, pos) for pos, c in enumerate(route) if instance.customers[c - 1].type == 'D']
+        for start in range(0, len(deliveries), params.M_D):
+            batch = deliveries[start:start + params.M_D]
+            meet_node, meet_pos = batch[0]
+            earliest_ready = max(instance.customers[c - 1].ready_time for c, _ in batch)
+            node = instance.customers[meet_node - 1]
+            dist = math.sqrt((instance.depot.x - node.x) ** 2 + (instance.depot.y - node.y) ** 2)
+            travel = dist / params.drone_speed
+            depart = max(earliest_ready, timeline[meet_pos]['arrival'] - travel - params.delta_prime)
+            flight = travel * 2 + params.delta_prime
+            if flight <= params.L_d:
+                returns.append(depart + flight)
+    return returns
+
+
+def reference_makespan(sol) -> float:
+    """Makespan of a solution (inf if infeasible)"""
+    instance, params = sol.instance, sol.params
+    served = [c for route in sol.truck_routes for c in route]
+    if len(served) != len(set(served)) or len(set(served)) != len(instance.customers):
+        return float('inf')
+    if not all(reference_check_truck_route(instance, params.M_T, r) for r in sol.truck_routes if r):
+        return float('inf')
+
+    times = [reference_truck_time(instance, params, r) for r in sol.truck_routes if r]
+    times += reference_drone_returns(instance, params, sol.truck_routes)
+    return max(times, default=0.0)
+
+
+class ShadowOracle:
+    def __init__(self, sample_rate: float = 0.1, strict: bool = False,
+                 tolerance: float = 1e-9, seed: int = 0, max_records: int = 100):
+        self.sample_rate = sample_rate
+        self.strict = strict  # Raise OracleMismatch on the first mismatch
+        # Absolute, in hours. Fast and reference paths both time in float64 from the
+        # same travel times (Instance.travel_times), so only rounding from a different
+        # summation order can separate them
+        self.tolerance = tolerance
+        self.max_records = max_records
+        self.rng = random.Random(seed)
+        self.checks = {}  # kind -> number of shadow evaluations
+        self.mismatches = []
+
+    def sample(self) -> bool:
+        return self.rng.random() < self.sample_rate
+
+    def _record(self, kind: str, route, fast, reference):
+        mismatch = {'kind': kind, 'route': list(route) if route is not None else None,
+                    'fast': fast, 'reference': reference}
+        if len(self.mismatches) < self.max_records:
+            self.mismatches.append(mismatch)
+        if self.strict:
+            raise OracleMismatch(f"{kind}: fast={fast!r} reference={reference!r} route={route}")
+
+    def _count(self, kind: str):
+        self.checks[kind] = self.checks.get(kind, 0) + 1
+
+    def _close(self, a: float, b: float) -> bool:
+        if a == b:
+            return True
+        return abs(a - b) <= self.tolerance
+
+    def check_route(self, instance, M_T: int, route: List[int], fast: bool):
+        self._count('check_truck_route')
+        reference = reference_check_truck_route(instance, M_T, route)
+        if reference != fast:
+            self._record('check_truck_route', route, fast, reference)
+
+    def check_insertion(self, instance, M_T: int, test_route: List[int], fast: bool):
+        self._count('route_state_insertion')
+        reference = reference_check_truck_route(instance, M_T, test_route)
+        if reference != fast:
+            self._record('route_state_insertion', test_route, fast, reference)
+
+    def check_truck_time(self, instance, params, route: List[int], fast: float):
+        self._count('calculate_truck_time')
+        reference = reference_truck_time(instance, params, route)
+        if not self._close(float(fast), reference):
+            self._record('calculate_truck_time', route, float(fast), reference)
+
+    def check_timeline(self, instance, params, route: List[int], fast: List[Dict]):
+        self._count('calculate_truck_timeline')
+        reference = reference_truck_timeline(instance, params, route)
+        same = len(fast) == len(reference) and all(
+            f['customer'] == r['customer'] and self._close(float(f['arrival']), r['arrival'])
+            and self._close(float(f['departure']), r['departure'])
+            for f, r in zip(fast, reference))
+        if not same:
+            self._record('calculate_truck_timeline', route, fast, reference)
+
+    def check_route_completion(self, instance, params, route: List[int], fast: float):
+        self._count('route_plan_completion')
+        reference = max([reference_truck_time(instance, params, route)]
+                        + reference_drone_returns(instance, params, [route]))
+        if not self._close(float(fast), reference):
+            self._record('route_plan_completion', route, float(fast), reference)
+
+    def check_solution(self, sol, fast: float):
+        self._count('evaluate_solution')
+        reference = reference_makespan(sol)
+        if math.isinf(reference) or math.isinf(fast):
+            same = math.isinf(reference) and math.isinf(fast)
+        else:
+            same = self._close(float(fast), reference)
+        if not same:
+            self._record('evaluate_solution', [r.copy() for r in sol.truck_routes], float(fast), reference)
+
+    def report(self):
+        total = sum(self.checks.values())
+        print(f"Shadow oracle: {total} checks, {len(self.mismatches)} mismatches")
+        for kind, n in sorted(self.checks.items()):
+            print(f"  {kind:28s} {n:8d}")
+        for m in self.mismatches[:10]:
+            print(f"  MISMATCH {m['kind']}: fast={m['fast']!r} reference={m['reference']!r}")
+            print(f"    route: {m['route']}")
+
+
+def enable(sample_rate: float = 0.1, strict: bool = False, **kwargs) -> ShadowOracle:
+    global active
+    active = ShadowOracle(sample_rate, strict, **kwargs)
+    return active
+
+
+def disable():
+    global active
+    active = None
+
+
+@contextmanager
+def shadow(sample_rate: float = 0.1, strict: bool = False, **kwargs):
+    """Shadow-evaluate fast paths while the block runs"""
+    global active
+    previous = active
+    oracle = enable(sample_rate, strict, **kwargs)
+    try:
+        yield oracle
+    finally:
+        active = previous
+
+
+if os.environ.get("ALNS_SHADOW"):
+    enable(float(os.environ["ALNS_SHADOW"]))
@@ -0,0 +1,174 @@
+"""Speculative destroy/repair candidates for batched ALNS iterations.
+
+With Parameters.batch_size > 1, every alns() iteration draws batch_size
+(destroy, repair) pairs from the operator weights and a seed per candidate
+from the main random stream. CandidateRunner then applies them all to the
+same current solution, on batch_workers persistent worker processes that
+attach the published instance once. Each candidate reseeds its own random
+stream, so the results - and the whole search trajectory - depend only on
+params.seed, not on the number of workers or on which worker ran what.
+
+Candidates carry the makespan their repair computed. The route completion
+times for the route pool and the precedence/capacity validity of every
+route come from one BatchEvaluator call per batch (an invalid route sets
+the candidate's makespan to inf, so it is rejected), and
+a candidate's full Solution (drone trips, truck times) is only rebuilt
+when alns() first reads it, i.e. when it is accepted - most of a batch is
+rejected and never pays for drone scheduling in this process.
+
+    runner = CandidateRunner(instance, params)
+    candidates = runner.run(current, [(random_removal, greedy_insertion, seed)], q)
+    runner.close()
+"""
+import functools
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import evaluate_solution
+from batch_eval import BatchEvaluator
+
+# Operator pair and random seed of one candidate
+CandidateSpec = Tuple[Callable, Callable, int]
+
+
+class Candidate:
+    """A repaired solution with the operators and CPU time that produced it.
+
+    Either built from an evaluated solution, or from routes and their
+    makespan with build() producing the evaluated solution on demand.
+    """
+    __slots__ = ['destroy', 'repair', 'routes', 'makespan', 'route_finish', 'removed',
+                 'destroy_seconds', 'repair_seconds', '_solution', '_build']
+
+    def __init__(self, destroy, repair, solution, removed, destroy_seconds, repair_seconds,
+                 routes=None, makespan=None, build=None):
+        self.destroy = destroy
+        self.repair = repair
+        self._solution = solution
+        self._build = build
+        self.routes = routes if routes is not None else solution.truck_routes
+        self.makespan = makespan if makespan is not None else solution.makespan
+        self.route_finish = None  # Completion time per route (BatchEvaluator), if scored
+        self.removed = removed  # Number of customers removed
+        self.destroy_seconds = destroy_seconds
+        self.repair_seconds = repair_seconds
+
+    @property
+    def solution(self) -> Solution:
+        if self._solution is None:
+            self._solution = self._build()
+            self._build = None
+        return self._solution
+
+
+def generate_candidate(current: Solution, destroy: Callable, repair: Callable, q: int,
+                       seed: int) -> Candidate:
+    """Destroy q customers of current and repair, under the given seed"""
+    random.seed(seed)
+    t0 = time.process_time()
+    destroyed, removed = destroy(current, q)
+    t1 = time.process_time()
+    new_sol = repair(destroyed, removed)
+    t2 = time.process_time()
+    return Candidate(destroy, repair, new_sol, len(removed), t1 - t0, t2 - t1)
+
+
+def _rebuild(instance: Instance, params: Parameters, routes: List[List[int]],
+             frozen: List[int]) -> Solution:
+    sol = Solution(instance, params)
+    sol.truck_routes = [list(r) for r in routes]
+    sol.frozen = list(frozen)
+    sol.makespan = evaluate_solution(sol)
+    return sol
+
+
+# Worker process state: instance, params and the last current solution
+_worker = {}
+
+
+def _init_worker(instance: Instance, params: Parameters):
+    _worker['instance'] = instance
+    _worker['params'] = params
+    _worker['key'] = None
+
+
+def _run_candidate(routes: List[List[int]], frozen: List[int], destroy: Callable,
+                   repair: Callable, q: int, seed: int) -> Tuple:
+    # Every candidate of a batch starts from the same solution: evaluate it once
+    key = (tuple(map(tuple, routes)), tuple(frozen))
+    if _worker['key'] != key:
+        _worker['current'] = _rebuild(_worker['instance'], _worker['params'], routes, frozen)
+        _worker['key'] = key
+    c = generate_candidate(_worker['current'], destroy, repair, q, seed)
+    return c.routes, c.makespan, c.removed, c.destroy_seconds, c.repair_seconds
+
+
+class CandidateRunner:
+    """Applies candidate specs to a solution, in worker processes or in-process.
+
+    workers <= 1 runs the candidates here, saving and restoring the main
+    random state around each, which gives the same results as the pool.
+    """
+
+    def __init__(self, instance: Instance, params: Parameters, workers: Optional[int] = None):
+        self.instance = instance
+        self.params = params
+        self.workers = workers if workers is not None else params.batch_workers
+        self.executor = None
+        self.evaluator = BatchEvaluator(instance, params)
+        self._published = False
+        if self.workers > 1:
+            if instance._handle is None:
+                instance.publish()
+                self._published = True
+            # Workers only receive the handle of the published instance
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(instance, params))
+
+    def run(self, current: Solution, specs: List[CandidateSpec], q: int) -> List[Candidate]:
+        """One candidate per spec, in spec order"""
+        if self.executor is None:
+            candidates = []
+            for destroy, repair, seed in specs:
+                state = random.getstate()
+                candidates.append(generate_candidate(current, destroy, repair, q, seed))
+                random.setstate(state)
+        else:
+            futures = [self.executor.submit(_run_candidate, current.truck_routes, current.frozen,
+                                            destroy, repair, q, seed)
+                       for destroy, repair, seed in specs]
+            candidates = []
+            for (destroy, repair, _), future in zip(specs, futures):
+                routes, makespan, removed, destroy_seconds, repair_seconds = future.result()
+                build = functools.partial(_rebuild, self.instance, self.params, routes,
+                                          current.frozen)
+                candidates.append(Candidate(destroy, repair, None, removed, destroy_seconds,
+                                            repair_seconds, routes, makespan, build))
+
+        # Route completions and validity of the whole batch in one vectorized call, in
+        # both modes so the route pool does not depend on the number of workers
+        finish, feasible = self.evaluator.route_completions(
+            [route for c in candidates for route in c.routes])
+        k = 0
+        for c in candidates:
+            n = len(c.routes)
+            c.route_finish = finish[k:k + n].tolist()
+            # A route breaking precedence or capacity rejects the candidate
+            if not feasible[k:k + n].all():
+                c.makespan = float('inf')
+            k += n
+        return candidates
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self._published:
+            self.instance.release()
+            self._published = False
@@ -0,0 +1,188 @@
+"""Profiling mode for solver runs (python main.py --profile DIR).
+
+profile_alns() runs alns() twice with the same seed: once under cProfile
+alone, for the phase timings, and once with
+- a sampling thread that records the main thread's stack every interval
+  seconds, written as collapsed stacks ("a;b;c count" lines, the input of
+  flamegraph.pl and speedscope);
+- a MemorySink that takes a tracemalloc snapshot whenever one of the given
+  solver events is emitted (alns_start, restart, alns_end by default),
+  recording the traced and peak memory and the top allocation sites.
+The second pass emits its solver events to the MemorySink only, so console
+output and reports appear once.
+
+Per instance it writes to DIR:
+    <instance>.pstats              cProfile statistics (python -m pstats)
+    <instance>.collapsed           sampled stacks
+    <instance>.memory.txt          peak and top allocation sites per point
+    <instance>.<k>_<event>.snapshot  tracemalloc snapshots (Snapshot.load)
+
+and returns the cumulative CPU time of the solver phases. Phases nest
+(evaluation and drone scheduling run inside repair), so they do not add
+up to the total.
+"""
+import copy
+import cProfile
+import os
+import pstats
+import random
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import events
+from model import Instance, Parameters
+from alns import alns
+
+# Phase -> profiled functions as (file name, function name)
+PHASES = {
+    'construction': [('initial_solution.py', 'create_initial_solution')],
+    'destroy': [('destroy.py', 'random_removal'), ('destroy.py', 'worst_removal'),
+                ('destroy.py', 'related_removal'), ('destroy.py', 'critical_removal'),
+                ('destroy.py', 'string_removal')],
+    'repair': [('repair.py', 'greedy_insertion'), ('repair.py', 'regret_insertion'),
+               ('repair.py', 'blink_insertion')],
+    'evaluation': [('evaluate.py', 'evaluate_solution')],
+    'drone scheduling': [('evaluate.py', 'schedule_route_drones')],
+    'solution copy': [('solution.py', 'copy')],
+    'path relinking': [('elite.py', 'path_relink')],
+    'recombination': [('route_pool.py', 'recombine')],
+}
+
+DEFAULT_POINTS = ('alns_start', 'restart', 'alns_end')
+
+
+def phase_times(stats: pstats.Stats) -> Dict[str, Tuple[int, float]]:
+    """Calls and cumulative seconds per phase"""
+    by_function = {}
+    for (filename, _, name), (_, calls, _, cumulative, _) in stats.stats.items():
+        key = (os.path.basename(filename), name)
+        prev_calls, prev_time = by_function.get(key, (0, 0.0))
+        by_function[key] = (prev_calls + calls, prev_time + cumulative)
+
+    phases = {}
+    for phase, functions in PHASES.items():
+        calls = sum(by_function.get(f, (0, 0.0))[0] for f in functions)
+        seconds = sum(by_function.get(f, (0, 0.0))[1] for f in functions)
+        phases[phase] = (calls, seconds)
+    return phases
+
+
+class StackSampler:
+    """Samples the stack of one thread from a background thread"""
+
+    def __init__(self, interval: float = 0.005, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, 'w') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class MemorySink:
+    """Event sink taking a tracemalloc snapshot at the given event kinds"""
+
+    def __init__(self, points=DEFAULT_POINTS, prefix: str = None, top: int = 10,
+                 verbosity: int = events.ITERATION):
+        self.verbosity = verbosity  # DEBUG to snapshot at per-iteration events
+        self.points = set(points)
+        self.prefix = prefix  # Snapshot files are written as <prefix>.<k>_<event>.snapshot
+        self.top = top
+        self.records = []  # Per point: event, iteration, current, peak, top sites
+
+    def write(self, event: Dict):
+        if event['event'] not in self.points or not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        sites = [(str(stat.traceback), stat.size, stat.count)
+                 for stat in snapshot.statistics('lineno')[:self.top]]
+        self.records.append({'event': event['event'], 'iteration': event.get('iteration'),
+                             'current': current, 'peak': peak, 'sites': sites})
+        if self.prefix is not None:
+            snapshot.dump(f"{self.prefix}.{len(self.records)}_{event['event']}.snapshot")
+
+    def write_report(self, path: str):
+        with open(path, 'w') as f:
+            for k, rec in enumerate(self.records, 1):
+                at = f" (iteration {rec['iteration']})" if rec['iteration'] is not None else ""
+                f.write(f"#{k} {rec['event']}{at}: current {rec['current'] / 2**20:.2f} MiB, "
+                        f"peak {rec['peak'] / 2**20:.2f} MiB\n")
+                for site, size, count in rec['sites']:
+                    f.write(f"    {size / 1024:10.1f} KiB {count:8d} blocks  {site}\n")
+
+    def close(self):
+        pass
+
+
+def profile_alns(instance: Instance, params: Parameters, out_dir: str,
+                 points: List[str] = DEFAULT_POINTS, interval: float = 0.005):
+    """Run alns() profiled, then traced; writes the files to out_dir and returns
+    (best of the profiled run, phase times)"""
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.join(out_dir, os.path.splitext(os.path.basename(instance.filename))[0])
+
+    # Same seed in both passes, so they follow the same trajectory (up to time_limit)
+    if params.seed is None:
+        params = copy.copy(params)
+        params.seed = random.getrandbits(32)
+
+    # Timed pass under cProfile alone: tracing and sampling would skew the timings
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        best = alns(instance, params)
+    finally:
+        profiler.disable()
+
+    # Separate pass for the stack samples and memory snapshots
+    memory = MemorySink(points, prefix=stem)
+    sampler = StackSampler(interval)
+    if points:
+        tracemalloc.start()
+    sampler.start()
+    try:
+        # Only the memory sink sees this pass: console and report sinks already saw the first
+        with events.only(memory):
+            alns(instance, params)
+    finally:
+        sampler.stop()
+        if points:
+            tracemalloc.stop()
+
+    profiler.dump_stats(f"{stem}.pstats")
+    sampler.write(f"{stem}.collapsed")
+    memory.write_report(f"{stem}.memory.txt")
+
+    phases = phase_times(pstats.Stats(profiler))
+    peak = max((rec['peak'] for rec in memory.records), default=0)
+    events.emit('profile', events.SUMMARY, instance=instance.filename, output=stem,
+                phases={name: seconds for name, (_, seconds) in phases.items()},
+                calls={name: calls for name, (calls, _) in phases.items()},
+                samples=sum(sampler.counts.values()), peak_memory=peak)
+    return best, phases
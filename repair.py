@@ -6,7 +6,7 @@ from typing import List, Dict, Tuple, Set
 import time
 
 from solution import Solution
-from evaluate import calculate_truck_time, evaluate_solution
+from evaluate import RoutePlan, evaluate_solution
 
 def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
     """Insert removed customers greedily - OPTIMIZED"""
@@ -33,11 +33,7 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
             else:
                 to_insert.append([cust_id])
         elif cust.type == 'DL':
-            p_id = None
-            for pid, did in new_sol.instance.pd_pairs.items():
-                if did == cust_id:
-                    p_id = pid
-                    break
+            p_id = new_sol.instance.pickup_of.get(cust_id)
             if p_id and p_id in removed and p_id not in inserted:
                 to_insert.append([p_id, cust_id])
                 inserted.add(p_id)
@@ -45,6 +41,10 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
             elif p_id not in removed:
                 to_insert.append([cust_id])
 
+    # Insertion costs include the drone trips of the route; plans are rebuilt
+    # only for the route that received the last unit
+    plans = {}
+
     # Insert each unit
     for customers in to_insert:
         best_cost = float('inf')
@@ -56,23 +56,27 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
 
         for truck_id in range(len(new_sol.truck_routes)):
             route = new_sol.truck_routes[truck_id]
+            state = new_sol.route_state(truck_id)
+            if truck_id not in plans:
+                plans[truck_id] = RoutePlan(new_sol, truck_id)
+            plan = plans[truck_id]
+            lo = new_sol.frozen[truck_id]  # Executed prefix stays untouched
+            open_len = len(route) - lo
 
             if len(customers) == 1:
                 # Single customer - sample positions intelligently
                 cust_id = customers[0]
                 
                 # Always check: start, end, and random samples
-                positions_to_check = [0, len(route)]
-                if len(route) > 2:
+                positions_to_check = [lo, len(route)]
+                if open_len > 2:
                     # Add evenly spaced positions
-                    step = max(1, len(route) // min(10, len(route)))
-                    positions_to_check.extend(range(step, len(route), step))
+                    step = max(1, open_len // min(10, open_len))
+                    positions_to_check.extend(range(lo + step, len(route), step))
                 
                 for pos in positions_to_check[:max_positions_to_check]:
-                    test_route = route[:pos] + [cust_id] + route[pos:]
-                    
-                    if new_sol.check_truck_route(truck_id, test_route):
-                        cost = calculate_truck_time(new_sol, truck_id, test_route)
+                    if state.can_insert(pos, cust_id):
+                        cost = plan.completion([(pos, cust_id)])
                         if cost < best_cost:
                             best_cost = cost
                             best_truck = truck_id
@@ -83,10 +87,10 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
                 route_len = len(route)
                 
                 # Sample positions intelligently
-                p_positions = [0, route_len]
-                if route_len > 2:
-                    step = max(1, route_len // min(5, route_len))
-                    p_positions.extend(range(step, route_len, step))
+                p_positions = [lo, route_len]
+                if open_len > 2:
+                    step = max(1, open_len // min(5, open_len))
+                    p_positions.extend(range(lo + step, route_len, step))
                 
                 for p_pos in p_positions[:20]:  # Limit P positions
                     # For each P position, try a few DL positions
@@ -97,11 +101,9 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
                     for dl_pos in dl_positions[:10]:  # Limit DL positions
                         if dl_pos <= p_pos:
                             continue
-                            
-                        test_route = route[:p_pos] + [p_id] + route[p_pos:dl_pos] + [dl_id] + route[dl_pos:]
-                        
-                        if new_sol.check_truck_route(truck_id, test_route):
-                            cost = calculate_truck_time(new_sol, truck_id, test_route)
+
+                        if state.can_insert_pair(p_pos, dl_pos, p_id, dl_id):
+                            cost = plan.completion([(p_pos, p_id), (dl_pos, dl_id)])
                             if cost < best_cost:
                                 best_cost = cost
                                 best_truck = truck_id
@@ -118,9 +120,11 @@ def greedy_insertion(sol: Solution, removed: List[int]) -> Solution:
                 p_id, dl_id = customers
                 p_pos, dl_pos = best_positions
                 new_sol.truck_routes[best_truck].insert(p_pos, p_id)
-                new_sol.truck_routes[best_truck].insert(dl_pos, dl_id)
+                # dl_pos indexes the route before P was inserted
+                new_sol.truck_routes[best_truck].insert(dl_pos + 1, dl_id)
             else:
                 new_sol.truck_routes[best_truck].extend(customers)
+        plans.pop(best_truck, None)
 
     new_sol.makespan = evaluate_solution(new_sol)
     return new_sol
@@ -150,16 +154,14 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
             else:
                 to_insert.append([cust_id])
         elif cust.type == 'DL':
-            p_id = None
-            for pid, did in new_sol.instance.pd_pairs.items():
-                if did == cust_id:
-                    p_id = pid
-                    break
+            p_id = new_sol.instance.pickup_of.get(cust_id)
             if p_id and p_id in removed and p_id not in inserted:
                 to_insert.append([p_id, cust_id])
                 inserted.add(p_id)
                 inserted.add(cust_id)
 
+    plans = {}  # Drone-aware insertion costs, as in greedy_insertion
+
     # Regret insertion loop
     while to_insert:
         max_regret = -float('inf')
@@ -180,20 +182,24 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
 
             for truck_id in range(len(new_sol.truck_routes)):
                 route = new_sol.truck_routes[truck_id]
+                state = new_sol.route_state(truck_id)
+                if truck_id not in plans:
+                    plans[truck_id] = RoutePlan(new_sol, truck_id)
+                plan = plans[truck_id]
+                lo = new_sol.frozen[truck_id]  # Executed prefix stays untouched
+                open_len = len(route) - lo
 
                 if len(unit) == 1:
                     # Sample positions
                     cust_id = unit[0]
-                    positions_to_try = [0, len(route)]
-                    if len(route) > 2:
-                        step = max(1, len(route) // 5)
-                        positions_to_try.extend(range(step, len(route), step))
+                    positions_to_try = [lo, len(route)]
+                    if open_len > 2:
+                        step = max(1, open_len // 5)
+                        positions_to_try.extend(range(lo + step, len(route), step))
                     
                     for pos in positions_to_try[:15]:  # Limit positions
-                        test_route = route[:pos] + [cust_id] + route[pos:]
-                        
-                        if new_sol.check_truck_route(truck_id, test_route):
-                            cost = calculate_truck_time(new_sol, truck_id, test_route)
+                        if state.can_insert(pos, cust_id):
+                            cost = plan.completion([(pos, cust_id)])
                             costs.append(cost)
                             positions.append((truck_id, [pos]))
                             
@@ -205,7 +211,7 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
                     route_len = len(route)
                     
                     # Try only key positions
-                    p_positions = [0, route_len] if route_len <= 10 else [0, route_len // 2, route_len]
+                    p_positions = [lo, route_len] if open_len <= 10 else [lo, lo + open_len // 2, route_len]
                     
                     for p_pos in p_positions[:5]:
                         dl_positions = [p_pos + 1, route_len + 1]
@@ -213,11 +219,9 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
                         for dl_pos in dl_positions[:3]:
                             if dl_pos <= p_pos:
                                 continue
-                                
-                            test_route = route[:p_pos] + [p_id] + route[p_pos:dl_pos] + [dl_id] + route[dl_pos:]
-                            
-                            if new_sol.check_truck_route(truck_id, test_route):
-                                cost = calculate_truck_time(new_sol, truck_id, test_route)
+
+                            if state.can_insert_pair(p_pos, dl_pos, p_id, dl_id):
+                                cost = plan.completion([(p_pos, p_id), (dl_pos, dl_id)])
                                 costs.append(cost)
                                 positions.append((truck_id, [p_pos, dl_pos]))
                                 
@@ -244,7 +248,7 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
         if best_unit is None:
             best_unit = to_insert[0]
             best_truck = 0
-            best_positions = [len(new_sol.truck_routes[0])]
+            best_positions = [len(new_sol.truck_routes[0])] * len(best_unit)
 
         if len(best_unit) == 1:
             new_sol.truck_routes[best_truck].insert(best_positions[0], best_unit[0])
@@ -252,9 +256,98 @@ def regret_insertion(sol: Solution, removed: List[int]) -> Solution:
             p_id, dl_id = best_unit
             p_pos, dl_pos = best_positions
             new_sol.truck_routes[best_truck].insert(p_pos, p_id)
-            new_sol.truck_routes[best_truck].insert(dl_pos, dl_id)
+            # dl_pos indexes the route before P was inserted
+            new_sol.truck_routes[best_truck].insert(dl_pos + 1, dl_id)
+        plans.pop(best_truck, None)
 
         to_insert.remove(best_unit)
 
     new_sol.makespan = evaluate_solution(new_sol)
-    return new_sol
\ No newline at end of file
+    return new_sol
+
+
+# Orders in which blink_insertion inserts the units, with their weights
+BLINK_ORDERS = ['random', 'ready', 'far', 'close']
+BLINK_ORDER_WEIGHTS = [4, 4, 2, 1]
+
+
+def blink_insertion(sol: Solution, removed: List[int]) -> Solution:
+    """Insert units one by one at their best position, scanning positions in
+    random order and skipping each with probability blink_rate (SISR)"""
+    new_sol = sol.copy()
+    instance = new_sol.instance
+    blink_rate = new_sol.params.blink_rate
+
+    # Units: D customers, P-DL pairs, and lone P or DL whose partner stayed
+    units = []
+    removed_set = set(removed)
+    for cust_id in removed:
+        cust = instance.customers[cust_id - 1]
+        if cust.type == 'P':
+            dl_id = instance.pd_pairs.get(cust_id)
+            units.append([cust_id, dl_id] if dl_id in removed_set else [cust_id])
+        elif cust.type == 'DL':
+            if instance.pickup_of.get(cust_id) not in removed_set:
+                units.append([cust_id])
+        else:
+            units.append([cust_id])
+
+    order = random.choices(BLINK_ORDERS, weights=BLINK_ORDER_WEIGHTS)[0]
+    if order == 'random':
+        random.shuffle(units)
+    elif order == 'ready':
+        units.sort(key=lambda u: instance.customers[u[-1] - 1].ready_time)
+    else:
+        depot_dist = instance.dist_matrix[0]
+        units.sort(key=lambda u: depot_dist[u[0]], reverse=(order == 'far'))
+
+    plans = {}
+    for unit in units:
+        best_cost = float('inf')
+        best_truck = 0
+        best_positions = []
+
+        for truck_id in range(len(new_sol.truck_routes)):
+            route = new_sol.truck_routes[truck_id]
+            state = new_sol.route_state(truck_id)
+            if truck_id not in plans:
+                plans[truck_id] = RoutePlan(new_sol, truck_id)
+            plan = plans[truck_id]
+            positions = list(range(new_sol.frozen[truck_id], len(route) + 1))
+            random.shuffle(positions)
+
+            if len(unit) == 1:
+                cust_id = unit[0]
+                for pos in positions:
+                    if random.random() < blink_rate or not state.can_insert(pos, cust_id):
+                        continue
+                    cost = plan.completion([(pos, cust_id)])
+                    if cost < best_cost:
+                        best_cost, best_truck, best_positions = cost, truck_id, [pos]
+            else:
+                # Pickup positions ranked by their own timing, then a delivery after the best few
+                p_id, dl_id = unit
+                p_costs = sorted((plan.completion([(pos, p_id)]), pos) for pos in positions
+                                 if random.random() >= blink_rate)
+                for _, p_pos in p_costs[:3]:
+                    for dl_pos in range(p_pos, len(route) + 1):
+                        if random.random() < blink_rate or not state.can_insert_pair(p_pos, dl_pos, p_id, dl_id):
+                            continue
+                        cost = plan.completion([(p_pos, p_id), (dl_pos, dl_id)])
+                        if cost < best_cost:
+                            best_cost, best_truck, best_positions = cost, truck_id, [p_pos, dl_pos]
+
+        route = new_sol.truck_routes[best_truck]
+        if not best_positions:
+            route.extend(unit)
+        elif len(unit) == 1:
+            route.insert(best_positions[0], unit[0])
+        else:
+            p_pos, dl_pos = best_positions
+            route.insert(p_pos, unit[0])
+            # dl_pos indexes the route before P was inserted
+            route.insert(dl_pos + 1, unit[1])
+        plans.pop(best_truck, None)
+
+    new_sol.makespan = evaluate_solution(new_sol)
+    return new_sol
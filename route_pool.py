@@ -0,0 +1,124 @@
+"""Route pool and set-covering recombination.
+
+RoutePool collects the distinct feasible truck routes seen during the
+search, each with its completion time (truck return or last drone return,
+whichever is later). Routes are deduplicated by their customer sequence and
+the pool is bounded: the least recently seen route is evicted first.
+
+recombine() searches for at most num_trucks pool routes that together
+cover every customer and minimize the largest completion time, with a
+depth-first branch and bound (no external solver). Customers covered
+twice are then dropped from all but one route (whole P-DL pairs, so the
+routes stay feasible) and the combination is re-evaluated.
+"""
+from collections import OrderedDict
+from typing import List, Optional
+
+from solution import Solution
+from evaluate import evaluate_solution
+
+
+class RoutePool:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.routes = OrderedDict()  # tuple(route) -> (customer bitmask, completion time)
+
+    def __len__(self):
+        return len(self.routes)
+
+    def add_solution(self, sol: Solution):
+        """Collect the routes of an evaluated feasible solution"""
+        if sol.makespan == float('inf') or not sol.truck_times:
+            return
+
+        finish = list(sol.truck_times)
+        for trip in sol.drone_trips:
+            finish[trip.meet_truck] = max(finish[trip.meet_truck], trip.return_time)
+        self.add_routes(sol.truck_routes, finish)
+
+    def add_routes(self, routes: List[List[int]], finish: List[float]):
+        """Collect feasible routes with their completion times"""
+        for route, route_finish in zip(routes, finish):
+            if not route:
+                continue
+            key = tuple(route)
+            if key in self.routes:
+                self.routes.move_to_end(key)
+                continue
+            mask = 0
+            for cust_id in route:
+                mask |= 1 << cust_id
+            self.routes[key] = (mask, float(route_finish))
+            if len(self.routes) > self.capacity:
+                self.routes.popitem(last=False)
+
+    def best_cover(self, n_customers: int, num_trucks: int, upper_bound: float,
+                   node_limit: int = 20000) -> Optional[List[tuple]]:
+        """At most num_trucks routes covering all customers with max time below upper_bound"""
+        full = sum(1 << c for c in range(1, n_customers + 1))
+        entries = sorted(((time, mask, key) for key, (mask, time) in self.routes.items()
+                          if time < upper_bound), key=lambda e: e[0])
+        if not entries:
+            return None
+
+        # Candidate routes per customer, fastest first
+        by_customer = {c: [] for c in range(1, n_customers + 1)}
+        for e in entries:
+            for c in by_customer:
+                if e[1] >> c & 1:
+                    by_customer[c].append(e)
+        if any(not cands for cands in by_customer.values()):
+            return None
+        max_len = max(len(e[2]) for e in entries)
+
+        best = [upper_bound, None]
+        nodes = [0]
+
+        def search(covered, chosen, worst):
+            nodes[0] += 1
+            if covered == full:
+                best[0], best[1] = worst, list(chosen)
+                return
+            slots = num_trucks - len(chosen)
+            uncovered = [c for c in by_customer if not covered >> c & 1]
+            if slots == 0 or len(uncovered) > slots * max_len or nodes[0] > node_limit:
+                return
+
+            # Branch on the uncovered customer with the fewest candidate routes
+            c = min(uncovered, key=lambda u: len(by_customer[u]))
+            for time, mask, key in by_customer[c]:
+                if time >= best[0]:
+                    break  # Sorted: every later candidate is slower
+                chosen.append(key)
+                search(covered | mask, chosen, max(worst, time))
+                chosen.pop()
+                if nodes[0] > node_limit:
+                    return
+
+        search(0, [], 0.0)
+        return best[1]
+
+    def recombine(self, sol: Solution, node_limit: int = 20000) -> Optional[Solution]:
+        """Best pool combination if it beats sol, else None"""
+        instance, params = sol.instance, sol.params
+        cover = self.best_cover(len(instance.customers), params.num_trucks, sol.makespan, node_limit)
+        if cover is None:
+            return None
+
+        # Customers covered twice stay only in the fastest route holding them. Every
+        # pool route holds both halves of its pairs, so pairs are never split.
+        seen = set()
+        routes = []
+        for key in sorted(cover, key=lambda k: self.routes[k][1]):
+            route = []
+            for cust_id in key:
+                if cust_id not in seen:
+                    route.append(cust_id)
+                    seen.add(cust_id)
+            routes.append(route)
+
+        new_sol = Solution(instance, params)
+        for truck_id, route in enumerate(routes):
+            new_sol.truck_routes[truck_id] = route
+        new_sol.makespan = evaluate_solution(new_sol)
+        return new_sol if new_sol.makespan < sol.makespan else None
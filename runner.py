@@ -0,0 +1,172 @@
+"""Multi-seed runs with adaptive replication.
+
+Each instance is solved with seeds seed, seed + 1, ... on a process pool,
+one wave of workers runs at a time. After min_runs runs, replication stops
+as soon as the 95% confidence interval of the mean best makespan is within
+rel_ci of the mean, or at max_runs, or when the instance's time budget is
+spent - so low-variance instances cost a few runs and noisy ones get more.
+Using the same seeds for two code versions or Parameters gives them common
+random numbers, which makes their differences comparable.
+
+Reports mean, best and standard deviation of the makespan, the interval,
+and the time to target: seconds until a run's best first reached target
+(default: within 1% of the best makespan found by any run).
+
+    python runner.py data/Instance/U_50_1.0_Num_1_pd.txt --rel-ci 0.005 --max-runs 30
+    python runner.py data/Instance/U_20_*.txt --params tuned_parameters.json --out runs.json
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from model import Instance, Parameters
+from alns import alns
+from tune import t_critical
+
+
+def seeded_run(instance: Instance, params: Parameters, seed: int) -> Dict:
+    """One alns() run; returns the final makespan and the (seconds, makespan) of each new best"""
+    params.seed = seed
+    start = time.perf_counter()
+    trajectory = []
+
+    def callback(iteration, best):
+        if not trajectory or best.makespan < trajectory[-1][1]:
+            trajectory.append((time.perf_counter() - start, float(best.makespan)))
+        return False
+
+    best = alns(instance, params, callback=callback)
+    seconds = time.perf_counter() - start
+    # The exact fast path can improve the best after the last callback
+    if not trajectory or best.makespan < trajectory[-1][1]:
+        trajectory.append((seconds, float(best.makespan)))
+    return {'seed': seed, 'makespan': float(best.makespan), 'seconds': seconds,
+            'trajectory': trajectory}
+
+
+def confidence_interval(values: List[float]) -> float:
+    """Half-width of the 95% interval of the mean (inf below two values)"""
+    n = len(values)
+    if n < 2:
+        return math.inf
+    mean = sum(values) / n
+    var = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return t_critical(n - 1) * math.sqrt(var / n)
+
+
+def time_to_target(trajectory: List, target: float) -> Optional[float]:
+    for seconds, makespan in trajectory:
+        if makespan <= target:
+            return seconds
+    return None
+
+
+def replicate(pool: ProcessPoolExecutor, workers: int, instance: Instance, params: Parameters,
+              seed: int = 0, min_runs: int = 5, max_runs: int = 30, rel_ci: float = 0.005,
+              budget: Optional[float] = None, target: Optional[float] = None) -> Dict:
+    """Run seeds seed, seed + 1, ... until the interval is tight, max_runs or budget"""
+    runs = []
+    start = time.perf_counter()
+    reason = f"{max_runs} runs"
+
+    while len(runs) < max_runs:
+        wave = min(max(workers, min_runs - len(runs)), max_runs - len(runs))
+        futures = [pool.submit(seeded_run, instance, params, seed + len(runs) + k)
+                   for k in range(wave)]
+        runs.extend(f.result() for f in futures)
+
+        makespans = [r['makespan'] for r in runs]
+        mean = sum(makespans) / len(makespans)
+        half = confidence_interval(makespans)
+        print(f"  {len(runs):3d} runs: mean {mean:.4f} +- {half:.4f}")
+
+        if len(runs) >= min_runs and half <= rel_ci * mean:
+            reason = f"interval within {rel_ci:.2%} of the mean"
+            break
+        if budget is not None and time.perf_counter() - start >= budget:
+            reason = f"budget of {budget:.0f}s spent"
+            break
+
+    makespans = [r['makespan'] for r in runs]
+    n = len(makespans)
+    mean = sum(makespans) / n
+    std = math.sqrt(sum((m - mean) ** 2 for m in makespans) / (n - 1)) if n > 1 else 0.0
+    best = min(makespans)
+    if target is None:
+        target = best * 1.01
+    ttt = [time_to_target(r['trajectory'], target) for r in runs]
+    reached = [t for t in ttt if t is not None]
+
+    return {
+        'instance': instance.filename,
+        'runs': n,
+        'stopped': reason,
+        'mean': mean,
+        'best': best,
+        'std': std,
+        'ci95': confidence_interval(makespans),
+        'target': target,
+        'reached_target': len(reached),
+        'mean_time_to_target': sum(reached) / len(reached) if reached else None,
+        'mean_seconds': sum(r['seconds'] for r in runs) / n,
+        'seeds': [r['seed'] for r in runs],
+        'makespans': makespans,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repeat alns() over seeds until the mean is tight")
+    parser.add_argument('instances', nargs='+')
+    parser.add_argument('--params', help="Tuned config file (Parameters.load)")
+    parser.add_argument('--iterations', type=int, help="Override max_iterations")
+    parser.add_argument('--time-limit', type=float, help="Seconds per run")
+    parser.add_argument('--seed', type=int, default=0, help="First seed")
+    parser.add_argument('--min-runs', type=int, default=5)
+    parser.add_argument('--max-runs', type=int, default=30)
+    parser.add_argument('--rel-ci', type=float, default=0.005,
+                        help="Target 95%% interval half-width relative to the mean")
+    parser.add_argument('--budget', type=float, help="Wall seconds per instance")
+    parser.add_argument('--target', type=float, help="Makespan for time-to-target (default best + 1%%)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--out', help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with ProcessPoolExecutor(args.workers) as pool:
+        for path in args.instances:
+            instance = Instance(path)
+            params = (Parameters.load(args.params, len(instance.customers))
+                      if args.params else Parameters())
+            if args.iterations is not None:
+                params.max_iterations = args.iterations
+            if args.time_limit is not None:
+                params.time_limit = args.time_limit
+
+            print(f"\n{os.path.basename(path)}")
+            instance.publish()
+            try:
+                result = replicate(pool, args.workers, instance, params, args.seed, args.min_runs,
+                                   args.max_runs, args.rel_ci, args.budget, args.target)
+            finally:
+                instance.release()
+            results.append(result)
+
+            ttt = result['mean_time_to_target']
+            print(f"  {result['runs']} runs ({result['stopped']}): mean {result['mean']:.4f} "
+                  f"+- {result['ci95']:.4f}, best {result['best']:.4f}, std {result['std']:.4f}")
+            print(f"  time to {result['target']:.4f}: "
+                  + (f"{ttt:.2f}s mean, {result['reached_target']}/{result['runs']} runs"
+                     if ttt is not None else "not reached"))
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
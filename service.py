@@ -0,0 +1,375 @@
+"""Local solve service: queue alns() jobs on a worker pool over HTTP.
+
+Endpoints (JSON over HTTP/1.1, one request per connection):
+    POST   /jobs              {"instance_path" | "instance": text, "params": {...},
+                               "deadline": seconds, "seed": int} -> job
+    GET    /jobs              all jobs
+    GET    /jobs/<id>         status, best makespan and final solution
+    GET    /jobs/<id>/events  newline-delimited JSON stream until the job ends
+    DELETE /jobs/<id>         cancel (a running job returns its best so far)
+    GET    /health            pool and cache summary
+
+Loaded instances are published to shared memory once and stay warm in the
+workers between jobs. Run with:
+    python service.py --port 8765 --workers 2
+    python service.py --unix /tmp/solver.sock
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from model import Instance, Parameters
+from alns import alns
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+EXPIRED = 'expired'
+FAILED = 'failed'
+FINISHED = (DONE, CANCELLED, EXPIRED, FAILED)
+
+HTTP_STATUS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def run_job(job_id: str, instance: Instance, overrides: Dict, time_limit: Optional[float],
+            seed: Optional[int], progress, cancel) -> Dict:
+    """Run alns() in a pool worker, streaming new best makespans to progress"""
+    params = Parameters().update(overrides)
+    if time_limit is not None:
+        params.time_limit = time_limit if params.time_limit is None else min(params.time_limit, time_limit)
+    if seed is not None:
+        params.seed = seed
+
+    last_best = [float('inf')]
+
+    def callback(iteration, best):
+        if best.makespan < last_best[0]:
+            last_best[0] = best.makespan
+            progress.put((job_id, {'event': 'best', 'iteration': iteration,
+                                   'makespan': float(best.makespan)}))
+        return cancel.is_set()
+
+    solution = alns(instance, params, callback)
+
+    result = solution.to_dict()
+    result['cancelled'] = cancel.is_set()
+    return result
+
+
+class Job:
+    def __init__(self, job_id: str, key: str, overrides: Dict, deadline: Optional[float],
+                 seed: Optional[int], cancel):
+        self.id = job_id
+        self.key = key  # Instance cache key
+        self.overrides = overrides
+        self.deadline = deadline  # Absolute time.time() or None
+        self.seed = seed
+        self.cancel = cancel  # Manager event shared with the worker
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.best_makespan = None
+        self.result = None
+        self.error = None
+        self.events = []
+        self.updated = asyncio.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'instance': self.key,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+            'best_makespan': self.best_makespan,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class SolveService:
+    def __init__(self, workers: int = 2, max_instances: int = 16):
+        self.workers = workers
+        self.max_instances = max_instances
+        self.jobs: Dict[str, Job] = {}
+        self.instances = OrderedDict()  # Cache key -> published Instance
+        self._ids = itertools.count(1)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        # Spawned workers: the server process already runs threads
+        ctx = multiprocessing.get_context('spawn')
+        self.manager = ctx.Manager()
+        self.progress = self.manager.Queue()
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=ctx)
+        self.queue = asyncio.Queue()
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        self._forwarder = threading.Thread(target=self._forward_progress, daemon=True)
+        self._forwarder.start()
+
+    async def stop(self):
+        for job in self.jobs.values():
+            if job.status in (QUEUED, RUNNING):
+                job.cancel.set()
+        for task in self._dispatchers:
+            task.cancel()
+        self.progress.put(None)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.manager.shutdown()
+        for instance in self.instances.values():
+            instance.release()
+        self.instances.clear()
+
+    # ------------------------------------------------------------------
+    # Jobs
+
+    def load_instance(self, path: Optional[str] = None, text: Optional[str] = None) -> str:
+        """Load (or reuse) an instance and return its cache key"""
+        if path is not None:
+            path = os.path.abspath(path)
+            key = f"{path}@{os.path.getmtime(path)}"
+        else:
+            key = "payload-" + hashlib.sha1(text.encode()).hexdigest()[:16]
+
+        if key in self.instances:
+            self.instances.move_to_end(key)
+            return key
+
+        instance = Instance(path or key, text)
+        if not instance.customers:
+            raise ValueError("Instance has no customers")
+        instance.publish()
+        self.instances[key] = instance
+
+        # Evict least recently used instances that no pending job needs
+        in_use = {job.key for job in self.jobs.values() if job.status not in FINISHED}
+        for old_key in list(self.instances):
+            if len(self.instances) <= self.max_instances:
+                break
+            if old_key != key and old_key not in in_use:
+                self.instances.pop(old_key).release()
+
+        return key
+
+    def submit(self, payload: Dict) -> Job:
+        if 'instance_path' in payload:
+            key = self.load_instance(path=payload['instance_path'])
+        elif 'instance' in payload:
+            key = self.load_instance(text=payload['instance'])
+        else:
+            raise ValueError("Expected 'instance_path' or 'instance'")
+
+        overrides = payload.get('params', {})
+        Parameters().update(overrides)  # Reject unknown names up front
+
+        deadline = payload.get('deadline')
+        if deadline is not None:
+            deadline = time.time() + float(deadline)
+
+        job = Job(str(next(self._ids)), key, overrides, deadline, payload.get('seed'),
+                  self.manager.Event())
+        self.jobs[job.id] = job
+        self._add_event(job, {'event': QUEUED})
+        self.queue.put_nowait(job)
+        return job
+
+    def cancel(self, job: Job):
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING:
+            job.cancel.set()
+
+    async def _dispatch(self):
+        while True:
+            job = await self.queue.get()
+            if job.status != QUEUED:
+                continue
+
+            time_limit = None
+            if job.deadline is not None:
+                time_limit = job.deadline - time.time()
+                if time_limit <= 0:
+                    self._finish(job, EXPIRED)
+                    continue
+
+            job.status = RUNNING
+            job.started = time.time()
+            self._add_event(job, {'event': RUNNING})
+
+            try:
+                result = await self.loop.run_in_executor(
+                    self.pool, run_job, job.id, self.instances[job.key], job.overrides,
+                    time_limit, job.seed, self.progress, job.cancel)
+            except Exception as e:
+                job.error = repr(e)
+                self._finish(job, FAILED)
+            else:
+                job.result = result
+                job.best_makespan = result['makespan']
+                self._finish(job, CANCELLED if result['cancelled'] else DONE)
+
+    def _forward_progress(self):
+        # Runs in a thread: the manager queue only has a blocking get
+        while True:
+            message = self.progress.get()
+            if message is None:
+                break
+            self.loop.call_soon_threadsafe(self._on_progress, *message)
+
+    def _on_progress(self, job_id: str, event: Dict):
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return
+        job.best_makespan = event['makespan']
+        self._add_event(job, event)
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished = time.time()
+        self._add_event(job, {'event': status, 'makespan': job.best_makespan})
+
+    def _add_event(self, job: Job, event: Dict):
+        event['time'] = time.time() - job.submitted
+        job.events.append(event)
+        # Wake up streaming readers
+        job.updated.set()
+        job.updated = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # HTTP
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, value = line.decode('latin-1').split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            try:
+                await self._route(method, target.split('?')[0], body, writer)
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                await self._send_json(writer, 400, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await self._send_json(writer, 500, {'error': repr(e)})
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        parts = [p for p in path.split('/') if p]
+
+        if parts == ['health']:
+            queued = sum(1 for job in self.jobs.values() if job.status == QUEUED)
+            running = sum(1 for job in self.jobs.values() if job.status == RUNNING)
+            await self._send_json(writer, 200, {'workers': self.workers, 'queued': queued,
+                                                'running': running,
+                                                'instances': list(self.instances)})
+            return
+
+        if not parts or parts[0] != 'jobs':
+            await self._send_json(writer, 404, {'error': f"No route for {path}"})
+            return
+
+        if len(parts) == 1:
+            if method == 'POST':
+                job = self.submit(json.loads(body or b'{}'))
+                await self._send_json(writer, 202, job.to_dict())
+            elif method == 'GET':
+                await self._send_json(writer, 200, [job.to_dict() for job in self.jobs.values()])
+            else:
+                await self._send_json(writer, 405, {'error': method})
+            return
+
+        job = self.jobs.get(parts[1])
+        if job is None:
+            await self._send_json(writer, 404, {'error': f"Unknown job {parts[1]}"})
+        elif len(parts) == 3 and parts[2] == 'events' and method == 'GET':
+            await self._stream_events(job, writer)
+        elif len(parts) == 2 and method == 'GET':
+            await self._send_json(writer, 200, job.to_dict())
+        elif len(parts) == 2 and method == 'DELETE':
+            self.cancel(job)
+            await self._send_json(writer, 202, job.to_dict())
+        else:
+            await self._send_json(writer, 405, {'error': method})
+
+    async def _stream_events(self, job: Job, writer: asyncio.StreamWriter):
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                     b'Connection: close\r\n\r\n')
+        sent = 0
+        while True:
+            updated = job.updated
+            for event in job.events[sent:]:
+                writer.write(json.dumps(event).encode() + b'\n')
+            sent = len(job.events)
+            await writer.drain()
+            if job.status in FINISHED:
+                return
+            await updated.wait()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, obj):
+        body = json.dumps(obj).encode()
+        writer.write(f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, unix_path: Optional[str] = None,
+                workers: int = 2):
+    service = SolveService(workers)
+    await service.start()
+    try:
+        if unix_path:
+            server = await asyncio.start_unix_server(service.handle, unix_path)
+            print(f"Solve service listening on {unix_path}")
+        else:
+            server = await asyncio.start_server(service.handle, host, port)
+            print(f"Solve service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ALNS solve service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="Serve on a Unix socket instead of TCP")
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import copy
-from typing import List
+from typing import Dict, List, Set, Tuple
 
+import oracle
 from model import Instance, Parameters
 
 
@@ -14,6 +15,108 @@ class DroneTrip:
         self.flight_time = 0.0
 
 
+def route_is_feasible(instance: Instance, route: List[int], M_T: int) -> bool:
+    """Replay a route checking P-DL precedence and truck capacity"""
+    load_change = instance.load_change
+    pair_mask = instance.pair_mask
+
+    load = 0
+    picked = 0  # Bitmask of pair ids whose pickup has been served
+
+    for cust_id in route:
+        change = load_change[cust_id]
+        if change > 0:
+            picked |= pair_mask[cust_id]
+        elif change < 0 and not picked & pair_mask[cust_id]:
+            return False
+
+        load += change
+        if load > M_T or load < 0:
+            return False
+
+    # Final load must be 0
+    return load == 0
+
+
+class RouteState:
+    """Prefix loads and pickup bitmasks of a truck route.
+
+    loads[k] and picked[k] describe the truck after serving the first k
+    customers, so inserting a unit between two positions can be checked
+    without replaying the route.
+    """
+
+    __slots__ = ["instance", "route", "M_T", "loads", "picked", "feasible"]
+
+    def __init__(self, instance: Instance, route: List[int], M_T: int):
+        self.instance = instance
+        self.route = route
+        self.M_T = M_T
+
+        load_change = instance.load_change
+        pair_mask = instance.pair_mask
+
+        load = 0
+        picked = 0
+        feasible = True
+        loads = [0]
+        masks = [0]
+
+        for cust_id in route:
+            change = load_change[cust_id]
+            if change > 0:
+                picked |= pair_mask[cust_id]
+            elif change < 0 and not picked & pair_mask[cust_id]:
+                feasible = False
+
+            load += change
+            if load > M_T or load < 0:
+                feasible = False
+            loads.append(load)
+            masks.append(picked)
+
+        self.loads = loads
+        self.picked = masks
+        self.feasible = feasible and load == 0
+
+    def can_insert(self, pos: int, cust_id: int) -> bool:
+        """Can a single customer be inserted before route[pos]?"""
+        if self.feasible:
+            # A lone P or DL always leaves a feasible route unbalanced
+            result = self.instance.load_change[cust_id] == 0
+            if oracle.active is not None and oracle.active.sample():
+                test_route = self.route[:pos] + [cust_id] + self.route[pos:]
+                oracle.active.check_insertion(self.instance, self.M_T, test_route, result)
+            return result
+
+        if self.instance.load_change[cust_id] < 0:
+            # A lone DL needs its pickup somewhere before pos
+            if not self.picked[pos] & self.instance.pair_mask[cust_id]:
+                return False
+
+        test_route = self.route[:pos] + [cust_id] + self.route[pos:]
+        return route_is_feasible(self.instance, test_route, self.M_T)
+
+    def can_insert_pair(self, p_pos: int, dl_pos: int, p_id: int, dl_id: int) -> bool:
+        """Can P go before route[p_pos] and DL before route[dl_pos]?"""
+        if self.feasible:
+            if dl_pos < p_pos:
+                return False
+            dl_pos = min(dl_pos, len(self.route))
+            # The pair's load is carried over route[p_pos:dl_pos]
+            peak = max(self.loads[p_pos:dl_pos + 1])
+            result = peak + self.instance.load_change[p_id] <= self.M_T
+            if oracle.active is not None and oracle.active.sample():
+                route = self.route
+                test_route = route[:p_pos] + [p_id] + route[p_pos:dl_pos] + [dl_id] + route[dl_pos:]
+                oracle.active.check_insertion(self.instance, self.M_T, test_route, result)
+            return result
+
+        route = self.route
+        test_route = route[:p_pos] + [p_id] + route[p_pos:dl_pos] + [dl_id] + route[dl_pos:]
+        return route_is_feasible(self.instance, test_route, self.M_T)
+
+
 class Solution:
     def __init__(self, instance: Instance, params: Parameters):
         self.instance = instance
@@ -21,6 +124,8 @@ class Solution:
         self.truck_routes = [[] for _ in range(params.num_trucks)]
         self.drone_trips = []
         self.makespan = float("inf")
+        self.truck_times = []  # Completion time per truck, set by evaluate_solution
+        self.frozen = [0] * params.num_trucks  # Executed route prefix per truck (online mode)
 
         # Cache for feasibility checks
         self._feasibility_cache = {}
@@ -30,8 +135,76 @@ class Solution:
         new_sol.truck_routes = [route.copy() for route in self.truck_routes]
         new_sol.drone_trips = copy.deepcopy(self.drone_trips)
         new_sol.makespan = self.makespan
+        new_sol.truck_times = self.truck_times.copy()
+        new_sol.frozen = self.frozen.copy()
         return new_sol
 
+    def to_dict(self) -> dict:
+        """JSON-friendly view of the routes, drone trips and makespan"""
+        return {
+            "makespan": float(self.makespan),
+            "truck_routes": [[int(c) for c in route] for route in self.truck_routes],
+            "drone_trips": [
+                {
+                    "items": [int(c) for c in trip.items],
+                    "meet_truck": trip.meet_truck,
+                    "meet_node": int(trip.meet_node),
+                    "depart_time": float(trip.depart_time),
+                    "return_time": float(trip.return_time),
+                    "flight_time": float(trip.flight_time),
+                }
+                for trip in self.drone_trips
+            ],
+        }
+
+    def frozen_customers(self) -> Set[int]:
+        """Customers the operators must leave in place (executed prefixes and
+        deliveries whose pickup was already executed)"""
+        if not any(self.frozen):
+            return set()
+
+        frozen = set()
+        for truck_id, route in enumerate(self.truck_routes):
+            for cust_id in route[:self.frozen[truck_id]]:
+                frozen.add(cust_id)
+                dl_id = self.instance.pd_pairs.get(cust_id)
+                if dl_id is not None:
+                    frozen.add(dl_id)
+        return frozen
+
+    def customer_index(self) -> Dict[int, Tuple[int, int]]:
+        """Customer -> (truck, position) in the current routes"""
+        index = {}
+        for truck_id, route in enumerate(self.truck_routes):
+            for pos, cust_id in enumerate(route):
+                index[cust_id] = (truck_id, pos)
+        return index
+
+    def remove_customers(self, removed: Set[int], index: Dict[int, Tuple[int, int]] = None):
+        """Drop the removed customers from their routes by in-place compaction.
+
+        With the customer index only the touched routes are compacted, each
+        from its first removed position on.
+        """
+        if index is None:
+            starts = {truck_id: 0 for truck_id in range(len(self.truck_routes))}
+        else:
+            starts = {}
+            for cust_id in removed:
+                if cust_id in index:
+                    truck_id, pos = index[cust_id]
+                    starts[truck_id] = min(pos, starts.get(truck_id, pos))
+
+        for truck_id, start in starts.items():
+            route = self.truck_routes[truck_id]
+            write = start
+            for read in range(start, len(route)):
+                cust_id = route[read]
+                if cust_id not in removed:
+                    route[write] = cust_id
+                    write += 1
+            del route[write:]
+
     def is_feasible(self) -> bool:
         """Check if solution is feasible - OPTIMIZED"""
         # Check all customers are served exactly once
@@ -54,7 +227,7 @@ class Solution:
         return True
 
     def check_truck_route(self, truck_id: int, route: List[int]) -> bool:
-        """Check truck route feasibility - OPTIMIZED"""
+        """Check truck route feasibility (full replay, used for final validation)"""
         if not route:
             return True
 
@@ -63,53 +236,16 @@ class Solution:
         if route_key in self._feasibility_cache:
             return self._feasibility_cache[route_key]
 
-        load = 0
-        time = 0.0
-
-        # Pre-fetch frequently accessed data
-        customers = self.instance.customers
-        dist_matrix = self.instance.dist_matrix
-        truck_speed = self.params.truck_speed
-        delta = self.params.delta
-        M_T = self.params.M_T
-
-        # Track pickups
-        pickup_served = set()
-        prev = 0
-
-        for cust_id in route:
-            cust = customers[cust_id - 1]
-
-            # Travel time
-            time += dist_matrix[prev][cust_id] / truck_speed
-
-            # Wait for ready time
-            if cust.type in ["D", "DL"]:
-                time = max(time, cust.ready_time)
-
-            # Check precedence and update load
-            if cust.type == "P":
-                pickup_served.add(cust.pair_id)
-                load += cust.weight
-            elif cust.type == "DL":
-                if cust.pair_id not in pickup_served:
-                    self._feasibility_cache[route_key] = False
-                    return False
-                load -= cust.weight
-
-            # Check capacity
-            if load > M_T or load < 0:
-                self._feasibility_cache[route_key] = False
-                return False
-
-            time += delta
-            prev = cust_id
-
-        # Final load must be 0
-        result = load == 0
+        result = route_is_feasible(self.instance, route, self.params.M_T)
+        if oracle.active is not None and oracle.active.sample():
+            oracle.active.check_route(self.instance, self.params.M_T, route, result)
         self._feasibility_cache[route_key] = result
         return result
 
+    def route_state(self, truck_id: int) -> "RouteState":
+        """Prefix state of a truck route for O(1) insertion checks"""
+        return RouteState(self.instance, self.truck_routes[truck_id], self.params.M_T)
+
     def get_pd_pair(self, cust_id: int):
         """Get paired customer ID"""
         cust = self.instance.customers[cust_id - 1]
@@ -117,7 +253,5 @@ class Solution:
         if cust.type == "P":
             return self.instance.pd_pairs.get(cust_id)
         elif cust.type == "DL":
-            for p_id, d_id in self.instance.pd_pairs.items():
-                if d_id == cust_id:
-                    return p_id
+            return self.instance.pickup_of.get(cust_id)
         return None
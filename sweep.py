@@ -0,0 +1,148 @@
+"""Fleet-sizing what-if sweeps.
+
+Runs alns() over a grid of num_trucks, M_D, M_T, drone_speed and L_d for
+each instance. Each instance is loaded once and shared with the
+workers. The grid is solved in waves: a configuration one step away from an
+already solved one starts from that neighbour's best solution and gets a
+smaller iteration budget. Configurations within a wave run in parallel.
+Writes one makespan table (CSV) per instance.
+
+    python sweep.py data/Instance/U_50_1.0_Num_1_pd.txt --trucks 1 2 3 --md 1 2 3
+
+num_drones is not swept: the drone scheduler does not limit the number of
+drones, so it would not change the makespan.
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from model import Instance, Parameters
+from solution import Solution
+from initial_solution import adapt_solution
+from alns import alns
+
+# Swept parameter -> command line option
+AXES = {
+    'num_trucks': 'trucks',
+    'M_D': 'md',
+    'M_T': 'mt',
+    'drone_speed': 'drone_speed',
+    'L_d': 'endurance',
+}
+
+
+def solve_config(instance: Instance, overrides: Dict, initial_routes: Optional[List[List[int]]],
+                 iterations: int, seed: int) -> Tuple[float, List[List[int]], float]:
+    """Solve one grid point, warm-started from initial_routes when given"""
+    params = Parameters().update(overrides)
+    params.max_iterations = iterations
+    params.seed = seed
+
+    start = time.time()
+    initial = None
+    if initial_routes is not None:
+        donor = Solution(instance, params)
+        donor.truck_routes = [route.copy() for route in initial_routes]
+        initial = adapt_solution(donor, params)
+    best = alns(instance, params, initial=initial)
+
+    return float(best.makespan), best.truck_routes, time.time() - start
+
+
+def sweep_instance(pool: ProcessPoolExecutor, instance: Instance, grid: Dict[str, List],
+                   iterations: int, warm_iterations: int, seed: int) -> List[Dict]:
+    axes = list(grid)
+    shape = [len(grid[a]) for a in axes]
+    points = list(itertools.product(*(range(n) for n in shape)))
+
+    # Wave k holds the grid points whose indices sum to k
+    waves = {}
+    for point in points:
+        waves.setdefault(sum(point), []).append(point)
+
+    solved = {}  # Grid point -> (makespan, routes)
+    rows = []
+
+    for level in sorted(waves):
+        futures = {}
+        for point in waves[level]:
+            overrides = {a: grid[a][i] for a, i in zip(axes, point)}
+
+            # Warm start from a solved neighbour one step back on some axis
+            donor = None
+            for k in range(len(point)):
+                if point[k] > 0:
+                    neighbour = point[:k] + (point[k] - 1,) + point[k + 1:]
+                    if neighbour in solved:
+                        donor = neighbour
+                        break
+
+            initial_routes = solved[donor][1] if donor is not None else None
+            budget = warm_iterations if donor is not None else iterations
+            futures[point] = (pool.submit(solve_config, instance, overrides, initial_routes,
+                                          budget, seed), overrides, donor)
+
+        for point, (future, overrides, donor) in futures.items():
+            makespan, routes, elapsed = future.result()
+            solved[point] = (makespan, routes)
+            row = dict(overrides)
+            row.update({
+                'makespan': makespan,
+                'seconds': round(elapsed, 2),
+                'warm_start_from': (" ".join(f"{a}={grid[a][i]}" for a, i in zip(axes, donor))
+                                    if donor is not None else ""),
+            })
+            rows.append(row)
+            print(f"  {overrides}: makespan {makespan:.3f}h ({elapsed:.1f}s)")
+
+    return rows
+
+
+def main():
+    defaults = Parameters()
+    parser = argparse.ArgumentParser(description="Fleet-sizing what-if sweeps")
+    parser.add_argument('instances', nargs='+')
+    parser.add_argument('--trucks', type=int, nargs='+', default=[defaults.num_trucks])
+    parser.add_argument('--md', type=int, nargs='+', default=[defaults.M_D])
+    parser.add_argument('--mt', type=int, nargs='+', default=[defaults.M_T])
+    parser.add_argument('--drone-speed', type=float, nargs='+', default=[defaults.drone_speed])
+    parser.add_argument('--endurance', type=float, nargs='+', default=[defaults.L_d * 60],
+                        help="Drone endurance L_d in minutes")
+    parser.add_argument('--iterations', type=int, default=defaults.max_iterations,
+                        help="ALNS iterations for cold-started grid points")
+    parser.add_argument('--warm-iterations', type=int, default=defaults.max_iterations // 4,
+                        help="ALNS iterations for warm-started grid points")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out-dir', default=".")
+    args = parser.parse_args()
+
+    grid = {param: getattr(args, option) for param, option in AXES.items()}
+    grid['L_d'] = [minutes / 60 for minutes in grid['L_d']]
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        for path in args.instances:
+            print(f"\nSweeping {os.path.basename(path)}")
+            instance = Instance(path)
+            instance.publish()
+            try:
+                rows = sweep_instance(pool, instance, grid, args.iterations,
+                                      args.warm_iterations, args.seed)
+            finally:
+                instance.release()
+
+            name = os.path.splitext(os.path.basename(path))[0]
+            out = os.path.join(args.out_dir, f"sweep_{name}.csv")
+            with open(out, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            print(f"Makespan table written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from model import Parameters
+from annealing import Temperature
+
+
+def test_zero_makespan_calibration_keeps_a_positive_temperature():
+    schedule = Temperature(Parameters())
+    # No samples (deadline passed) on a zero makespan: the fallback mean worsening is 0
+    mean, samples = schedule.calibrate(SimpleNamespace(makespan=0.0), [], [], 1, deadline=0)
+    assert (mean, samples) == (0.0, 0)
+    assert schedule.start > 0 and schedule.end > 0
+    schedule.update(0.5)
+    assert schedule.acceptance(0.1) == 0.0
+
+
+def test_geometric_cooling_to_zero_rejects_worsenings():
+    params = Parameters().update({'temp_start': 0.0, 'cooling_rate': 0.5})
+    schedule = Temperature(params)
+    for _ in range(2000):
+        schedule.update(0.0)
+    assert schedule.acceptance(1.0) == 0.0
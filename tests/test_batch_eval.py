@@ -0,0 +1,44 @@
+import os
+import random
+
+import pytest
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import calculate_truck_time, route_makespan
+from batch_eval import BatchEvaluator
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+
+
+def random_routes(rng, n_customers, n_routes):
+    """Random split of a random customer order, so routes differ in length (some empty)"""
+    order = list(range(1, n_customers + 1))
+    rng.shuffle(order)
+    cuts = sorted(rng.randint(0, n_customers) for _ in range(n_routes - 1))
+    return [order[a:b] for a, b in zip([0] + cuts, cuts + [n_customers])]
+
+
+@pytest.mark.parametrize("name", ["U_10_0.5_Num_1_pd.txt", "U_20_1.0_Num_2_pd.txt"])
+def test_batch_matches_route_checks(name):
+    instance = Instance(os.path.join(DATA, name))
+    params = Parameters()
+    evaluator = BatchEvaluator(instance, params)
+    rng = random.Random(0)
+
+    n_infeasible = 0
+    for _ in range(200):
+        sol = Solution(instance, params)
+        sol.truck_routes = random_routes(rng, len(instance.customers), rng.randint(1, 4))
+        times = evaluator.route_times(*evaluator.pack(sol.truck_routes))
+        finish, _ = evaluator.route_completions(sol.truck_routes)
+
+        for t, route in enumerate(sol.truck_routes):
+            feasible = sol.check_truck_route(t, route)
+            assert bool(times['feasible'][t]) == feasible
+            n_infeasible += not feasible
+            assert times['completion'][t] == pytest.approx(calculate_truck_time(sol, t, route),
+                                                           abs=1e-9)
+            assert finish[t] == pytest.approx(route_makespan(sol, t), abs=1e-9)
+
+    assert n_infeasible > 0
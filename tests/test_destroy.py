@@ -0,0 +1,22 @@
+import os
+import random
+
+from model import Instance, Parameters
+from initial_solution import create_initial_solution
+from destroy import string_removal
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+
+
+def test_string_removal_small_q_removes_customers():
+    instance = Instance(os.path.join(DATA, "U_50_2.0_Num_3_pd.txt"))
+    params = Parameters()
+    random.seed(0)
+    sol = create_initial_solution(instance, params)
+    for q in (1, 2):
+        for seed in range(50):
+            random.seed(seed)
+            destroyed, removed = string_removal(sol, q)
+            assert removed
+            routed = [c for route in destroyed.truck_routes for c in route]
+            assert sorted(routed + removed) == list(range(1, len(instance.customers) + 1))
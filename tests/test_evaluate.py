@@ -0,0 +1,51 @@
+import os
+import random
+
+import pytest
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import RoutePlan, route_makespan
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+
+
+def completion_after(instance, params, routes, truck_id, route):
+    sol = Solution(instance, params)
+    sol.truck_routes = [list(r) for r in routes]
+    sol.truck_routes[truck_id] = route
+    return route_makespan(sol, truck_id)
+
+
+# Default drones, and slow drones with room for big batches so drone returns set the completion
+@pytest.mark.parametrize("drone_speed, M_D", [(60, 2), (15, 4)])
+@pytest.mark.parametrize("name", ["U_10_0.5_Num_1_pd.txt", "U_20_1.0_Num_2_pd.txt"])
+def test_route_plan_completion_matches_evaluation(name, drone_speed, M_D):
+    instance = Instance(os.path.join(DATA, name))
+    params = Parameters().update({'drone_speed': drone_speed, 'M_D': M_D, 'L_d': 10.0})
+    rng = random.Random(0)
+    customers = list(range(1, len(instance.customers) + 1))
+
+    for _ in range(20):
+        order = rng.sample(customers, len(customers))
+        cut = rng.randint(0, len(order))
+        routes = [order[:cut], order[cut:]]
+        sol = Solution(instance, params)
+        sol.truck_routes = routes
+
+        for truck_id, route in enumerate(routes):
+            plan = RoutePlan(sol, truck_id)
+            assert plan.completion() == pytest.approx(route_makespan(sol, truck_id), abs=1e-9)
+            others = [c for c in customers if c not in route]
+            for cust_id in rng.sample(others, min(3, len(others))):
+                for pos in range(len(route) + 1):
+                    expected = completion_after(instance, params, routes, truck_id,
+                                                route[:pos] + [cust_id] + route[pos:])
+                    assert plan.completion([(pos, cust_id)]) == pytest.approx(expected, abs=1e-9)
+            if len(others) >= 2:
+                a, b = rng.sample(others, 2)
+                for i in range(len(route) + 1):
+                    for j in range(i, len(route) + 1):
+                        expected = completion_after(instance, params, routes, truck_id,
+                                                    route[:i] + [a] + route[i:j] + [b] + route[j:])
+                        assert plan.completion([(i, a), (j, b)]) == pytest.approx(expected, abs=1e-9)
@@ -0,0 +1,59 @@
+import itertools
+import os
+
+import pytest
+
+from model import Instance, Parameters
+from solution import Solution
+from evaluate import evaluate_solution
+from exact import solve_exact
+from alns import alns
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+U_10 = os.path.join(DATA, "U_10_0.5_Num_1_pd.txt")
+
+
+def sub_instance(path, keep):
+    """Instance of the given customer ids of a file, renumbered 1..len(keep)"""
+    with open(path) as f:
+        rows = [line.split() for line in f if line.strip() and not line.startswith('#')]
+    by_id = {int(row[0]): row for row in rows}
+    lines = [" ".join([str(k)] + by_id[c][1:]) for k, c in enumerate(keep, 1)]
+    return Instance(f"{path}[{','.join(map(str, keep))}]", "\n".join(lines))
+
+
+def brute_force(instance, params):
+    """Best makespan over every customer order split into two routes"""
+    best = float('inf')
+    for order in itertools.permutations(range(1, len(instance.customers) + 1)):
+        for cut in range(len(order) + 1):
+            sol = Solution(instance, params)
+            sol.truck_routes = [list(order[:cut]), list(order[cut:])]
+            best = min(best, evaluate_solution(sol))
+    return best
+
+
+@pytest.mark.parametrize("keep", [[1, 2, 3, 4, 5, 10], [3, 4, 6, 7, 8, 9, 10]])
+def test_exact_matches_brute_force(keep):
+    instance = sub_instance(U_10, keep)
+    params = Parameters()
+    sol = solve_exact(instance, params)
+    assert sol.makespan == pytest.approx(brute_force(instance, params), abs=1e-9)
+
+
+def test_exact_on_u10_is_evaluated_and_optimal():
+    instance = Instance(U_10)
+    params = Parameters()
+    sol = solve_exact(instance, params)
+
+    check = Solution(instance, params)
+    check.truck_routes = [list(r) for r in sol.truck_routes]
+    assert sorted(c for r in check.truck_routes for c in r) == list(range(1, 11))
+    assert evaluate_solution(check) == pytest.approx(sol.makespan, abs=1e-9)
+
+    # No heuristic run beats it
+    params.exact_max_customers = 0
+    for seed in range(3):
+        params.seed = seed
+        params.max_iterations = 200
+        assert alns(instance, params).makespan >= sol.makespan - 1e-9
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_profile_reports_once(tmp_path):
+    out = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"),
+         os.path.join(ROOT, "data", "Instance", "U_10_0.5_Num_1_pd.txt"),
+         "--profile", str(tmp_path), "--seed", "1", "--verbosity", "1"],
+        cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    for line in ("Initial makespan", "ALNS completed", "FINAL SOLUTION", "PHASES"):
+        assert out.count(line) == 1, line
+    assert (tmp_path / "U_10_0.5_Num_1_pd.pstats").exists()
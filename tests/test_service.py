@@ -0,0 +1,94 @@
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import model
+from model import Instance
+from service import SolveService, FINISHED
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+async def wait_finished(port, job_id, timeout=120):
+    for _ in range(int(timeout / 0.1)):
+        _, job = await request(port, 'GET', f'/jobs/{job_id}')
+        if job['status'] in FINISHED:
+            return job
+        await asyncio.sleep(0.1)
+    raise TimeoutError(job_id)
+
+
+async def exercise_service():
+    service = SolveService(workers=1, max_instances=1)
+    await service.start()
+    server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        # Submit and poll a short job to completion
+        status, job = await request(port, 'POST', '/jobs', {
+            'instance_path': os.path.join(DATA, "U_10_0.5_Num_1_pd.txt"),
+            'params': {'max_iterations': 20}, 'seed': 0})
+        assert status == 202
+        job = await wait_finished(port, job['id'])
+        assert job['status'] == 'done'
+        assert job['best_makespan'] == job['result']['makespan'] > 0
+
+        # A second instance evicts the first from the cache (max_instances=1);
+        # cancelling the long job returns its best so far
+        status, job = await request(port, 'POST', '/jobs', {
+            'instance_path': os.path.join(DATA, "U_20_0.5_Num_1_pd.txt"),
+            'params': {'max_iterations': 10 ** 6, 'exact_max_customers': 0, 'target_gap': 0}, 'seed': 0})
+        _, health = await request(port, 'GET', '/health')
+        assert len(health['instances']) == 1 and 'U_20_0.5' in health['instances'][0]
+
+        while job['status'] != 'running':
+            await asyncio.sleep(0.1)
+            _, job = await request(port, 'GET', f"/jobs/{job['id']}")
+        status, _ = await request(port, 'DELETE', f"/jobs/{job['id']}")
+        assert status == 202
+        job = await wait_finished(port, job['id'])
+        assert job['status'] == 'cancelled'
+        assert job['result']['cancelled']
+
+        status, _ = await request(port, 'GET', '/jobs/unknown')
+        assert status == 404
+    finally:
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+
+def test_service_on_localhost():
+    asyncio.run(exercise_service())
+
+
+def attached_count(instance):
+    return sum(1 for inst in model._attached_instances.values() if not inst._owner)
+
+
+def test_worker_attachments_are_bounded():
+    paths = sorted(os.path.join(DATA, f) for f in os.listdir(DATA) if f.startswith("U_10_"))
+    instances = [Instance(p) for p in paths[:6]]
+    for inst in instances:
+        inst.publish()
+    try:
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            counts = [pool.submit(attached_count, inst).result() for inst in instances]
+        assert counts == [min(k, model.MAX_ATTACHED_INSTANCES) for k in range(1, 7)]
+    finally:
+        for inst in instances:
+            inst.release()
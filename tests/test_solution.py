@@ -0,0 +1,47 @@
+import os
+import random
+
+import pytest
+
+from model import Instance, Parameters
+from initial_solution import create_initial_solution
+from solution import RouteState, route_is_feasible
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "Instance")
+
+
+def sample_routes(instance, params, rng):
+    """Feasible routes of a constructed solution and random (often infeasible) orders"""
+    random.seed(0)
+    routes = [r for r in create_initial_solution(instance, params).truck_routes if r]
+    customers = list(range(1, len(instance.customers) + 1))
+    for _ in range(30):
+        routes.append(rng.sample(customers, rng.randint(0, len(customers))))
+    return routes
+
+
+@pytest.mark.parametrize("name", ["U_10_0.5_Num_1_pd.txt", "U_20_1.0_Num_2_pd.txt"])
+def test_insertion_checks_match_replay(name):
+    instance = Instance(os.path.join(DATA, name))
+    params = Parameters()
+    rng = random.Random(0)
+    M_T = params.M_T
+
+    for route in sample_routes(instance, params, rng):
+        for p_id, dl_id in instance.pd_pairs.items():
+            # Insert a pair that is not on the route yet
+            base = [c for c in route if c not in (p_id, dl_id)]
+            state = RouteState(instance, base, M_T)
+            for p_pos in range(len(base) + 1):
+                # dl_pos == len(base) + 1 is what greedy insertion tries for "at the end"
+                for dl_pos in range(p_pos, len(base) + 2):
+                    test_route = base[:p_pos] + [p_id] + base[p_pos:dl_pos] + [dl_id] + base[dl_pos:]
+                    assert (state.can_insert_pair(p_pos, dl_pos, p_id, dl_id)
+                            == route_is_feasible(instance, test_route, M_T)), (base, p_pos, dl_pos)
+
+        for cust_id in range(1, len(instance.customers) + 1):
+            base = [c for c in route if c != cust_id]
+            state = RouteState(instance, base, M_T)
+            for pos in range(len(base) + 1):
+                test_route = base[:pos] + [cust_id] + base[pos:]
+                assert state.can_insert(pos, cust_id) == route_is_feasible(instance, test_route, M_T)
@@ -0,0 +1,182 @@
+"""Racing-based tuning of the ALNS Parameters per instance size.
+
+Every candidate configuration is run on the same sequence of blocks
+(instance file of the U_{n}_{beta} family + seed) on a process pool. After
+min_blocks blocks, configurations whose relative makespan is significantly
+worse than the current leader (paired t-test) are dropped, so the remaining
+budget goes to the promising ones. The winner per size is written as a
+config that Parameters.load(path, n_customers) reads back.
+
+    python tune.py --sizes 10 20 50 100 --configs 12 --budget 5 --out tuned_parameters.json
+"""
+import argparse
+import glob
+import itertools
+import json
+import math
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from model import Instance, Parameters
+from alns import alns
+
+# Values tried for each tuned parameter
+SEARCH_SPACE = {
+    'start_acceptance': [0.2, 0.5, 0.8],
+    'end_acceptance': [0.001, 0.01, 0.05],
+    'destroy_rate': [0.1, 0.15, 0.25, 0.35],
+    'scores': [[15, 8, 2], [33, 9, 13], [10, 5, 1]],
+    'operator_selection': ['classic', 'time'],
+}
+
+# Two-sided 5% critical values of Student's t by degrees of freedom
+T_CRITICAL = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+              2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+              2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def t_critical(df: int) -> float:
+    return T_CRITICAL[df - 1] if df <= len(T_CRITICAL) else 1.96
+
+
+def instance_files(size: int, data_dir: str = "data/Instance") -> List[str]:
+    """All files of the U_{size}_{beta}_Num_{k} family, sorted"""
+    pattern = re.compile(rf"U_{size}_[0-9.]+_Num_\d+_pd\.txt$")
+    return sorted(f for f in glob.glob(os.path.join(data_dir, "*.txt"))
+                  if pattern.search(os.path.basename(f)))
+
+
+def sample_configs(n: int, rng: random.Random) -> List[Dict]:
+    """The current defaults plus n-1 distinct random points of SEARCH_SPACE"""
+    defaults = Parameters()
+    configs = [{name: getattr(defaults, name) for name in SEARCH_SPACE}]
+    grid = list(itertools.product(*SEARCH_SPACE.values()))
+    rng.shuffle(grid)
+    for values in grid:
+        if len(configs) >= n:
+            break
+        config = dict(zip(SEARCH_SPACE, values))
+        if config not in configs:
+            configs.append(config)
+    return configs
+
+
+def run_config(instance: Instance, overrides: Dict, seed: int, budget: float) -> float:
+    """One alns() run under a time budget; returns the best makespan"""
+    params = Parameters().update(overrides)
+    params.seed = seed
+    params.time_limit = budget
+    params.max_iterations = 10 ** 9  # The time budget is the limit
+
+    return float(alns(instance, params).makespan)
+
+
+def race(pool: ProcessPoolExecutor, instances: List[Instance], configs: List[Dict],
+         budget: float, max_blocks: int, min_blocks: int, rng: random.Random) -> Tuple[int, Dict]:
+    """Race configs over (instance, seed) blocks; returns (winner index, summary)"""
+    blocks = [(inst, rng.randrange(2 ** 31)) for inst in instances]
+    rng.shuffle(blocks)
+    blocks = blocks[:max_blocks]
+
+    alive = list(range(len(configs)))
+    costs = {i: [] for i in alive}  # Makespan relative to the block's best
+
+    for k, (inst, seed) in enumerate(blocks, 1):
+        futures = {i: pool.submit(run_config, inst, configs[i], seed, budget) for i in alive}
+        makespans = {i: f.result() for i, f in futures.items()}
+        block_best = min(makespans.values())
+        for i, m in makespans.items():
+            costs[i].append(m / block_best if block_best > 0 else 1.0)
+
+        leader = min(alive, key=lambda i: sum(costs[i]) / k)
+        print(f"  block {k}/{len(blocks)} ({os.path.basename(inst.filename)}): "
+              f"{len(alive)} alive, leader #{leader} "
+              f"mean relative makespan {sum(costs[leader]) / k:.4f}")
+
+        if k < min_blocks or len(alive) == 1:
+            continue
+
+        # Drop configurations significantly worse than the leader (paired t-test)
+        survivors = []
+        for i in alive:
+            diffs = [a - b for a, b in zip(costs[i], costs[leader])]
+            mean = sum(diffs) / k
+            var = sum((d - mean) ** 2 for d in diffs) / (k - 1)
+            if i == leader or mean <= 0:
+                survivors.append(i)
+            # A constant positive difference (var 0) is worse on every block: dropped
+            elif var > 0 and mean / math.sqrt(var / k) <= t_critical(k - 1):
+                survivors.append(i)
+        alive = survivors
+
+        if len(alive) == 1:
+            break
+
+    winner = min(alive, key=lambda i: sum(costs[i]) / len(costs[i]))
+    summary = {
+        'params': configs[winner],
+        'blocks': len(costs[winner]),
+        'mean_relative_makespan': sum(costs[winner]) / len(costs[winner]),
+        'finalists': len(alive),
+        'budget_seconds': budget,
+    }
+    return winner, summary
+
+
+def tune(sizes: List[int], n_configs: int, budget: float, workers: int, max_blocks: int,
+         min_blocks: int, seed: int, data_dir: str = "data/Instance") -> Dict:
+    rng = random.Random(seed)
+    configs = sample_configs(n_configs, rng)
+    result = {}
+
+    with ProcessPoolExecutor(workers) as pool:
+        for size in sizes:
+            files = instance_files(size, data_dir)
+            if not files:
+                print(f"No instances for size {size}, skipping")
+                continue
+
+            print(f"\nTuning U_{size}: {len(configs)} configurations, {len(files)} instances")
+            instances = [Instance(f) for f in files]
+            # Workers map the instance data instead of unpickling it per task
+            for inst in instances:
+                inst.publish()
+
+            try:
+                winner, summary = race(pool, instances, configs, budget, max_blocks, min_blocks, rng)
+            finally:
+                for inst in instances:
+                    inst.release()
+
+            result[str(size)] = summary
+            print(f"  U_{size}: configuration #{winner} {summary['params']}")
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Racing-based ALNS parameter tuner")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 20, 50, 100])
+    parser.add_argument('--configs', type=int, default=12, help="Candidate configurations")
+    parser.add_argument('--budget', type=float, default=5.0, help="Seconds per alns() run")
+    parser.add_argument('--max-blocks', type=int, default=20)
+    parser.add_argument('--min-blocks', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default="data/Instance")
+    parser.add_argument('--out', default="tuned_parameters.json")
+    args = parser.parse_args()
+
+    result = tune(args.sizes, args.configs, args.budget, args.workers, args.max_blocks,
+                  args.min_blocks, args.seed, args.data_dir)
+
+    with open(args.out, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"\nRecommended settings written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()